@@ -0,0 +1,190 @@
+"""Нагрузочный тест лент: WSGI против ASGI-обёртки yatube.asgi.
+
+Оба пути вызываются в процессе, без сети. WSGI моделирует потоковый
+сервер: столько потоков, сколько одновременных клиентов. ASGI —
+цикл событий с теми же клиентами-корутинами, запросы которых
+выполняются в пуле из --threads потоков.
+
+    python benchmarks/bench_asgi.py --clients 64 --threads 16
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import progress, setup_django  # noqa: E402
+
+
+def populate(options):
+    from django.db import connections
+    from django.test import Client
+
+    from posts import bulk
+    from posts.models import Follow, Post, User
+
+    rnd = random.Random(options.seed)
+    User.objects.bulk_create(
+        User(username=f'author{i}') for i in range(options.authors)
+    )
+    authors = list(User.objects.all())
+    reader = User.objects.create_user(username='reader')
+    Follow.objects.bulk_create(
+        Follow(user=reader, author=author) for author in authors
+    )
+    Post.objects.bulk_create(
+        Post(text=f'Пост {i}', author=rnd.choice(authors))
+        for i in range(options.posts)
+    )
+    bulk.after_load()
+    client = Client()
+    client.force_login(reader)
+    connections.close_all()
+    return {
+        'authors': [author.username for author in authors],
+        'posts': list(Post.objects.values_list('pk', flat=True)),
+        'cookie': f'sessionid={client.cookies["sessionid"].value}',
+    }
+
+
+def requests(data, rnd, count):
+    """Случайная смесь index, profile, post_detail и follow_index."""
+    for _ in range(count):
+        kind = rnd.choice(('index', 'profile', 'post_detail', 'follow'))
+        if kind == 'index':
+            yield '/', ''
+        elif kind == 'profile':
+            yield f'/profile/{rnd.choice(data["authors"])}/', ''
+        elif kind == 'post_detail':
+            yield f'/posts/{rnd.choice(data["posts"])}/', ''
+        else:
+            yield '/follow/', data['cookie']
+
+
+def scope(path, cookie):
+    headers = [(b'host', b'localhost')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode()))
+    return {
+        'type': 'http', 'method': 'GET', 'path': path,
+        'query_string': b'', 'headers': headers,
+    }
+
+
+def run_wsgi(application, data, options):
+    from django.db import connections
+
+    from core.asgi import build_environ
+
+    def client(number):
+        rnd = random.Random(options.seed + number)
+        latencies = []
+        for path, cookie in requests(data, rnd, options.requests):
+            environ = build_environ(scope(path, cookie), io.BytesIO())
+            started = time.perf_counter()
+            response = application(environ, lambda *args: None)
+            b''.join(response)
+            response.close()
+            latencies.append((time.perf_counter() - started) * 1000)
+        connections.close_all()
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=options.clients) as pool:
+        return [
+            latency
+            for latencies in pool.map(client, range(options.clients))
+            for latency in latencies
+        ]
+
+
+def run_asgi(application, data, options):
+    async def client(number):
+        rnd = random.Random(options.seed + number)
+        latencies = []
+        for path, cookie in requests(data, rnd, options.requests):
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                pass
+
+            started = time.perf_counter()
+            await application(scope(path, cookie), receive, send)
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies
+
+    async def main():
+        results = await asyncio.gather(
+            *(client(number) for number in range(options.clients))
+        )
+        return [latency for latencies in results for latency in latencies]
+
+    return asyncio.run(main())
+
+
+def summary(latencies, elapsed):
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'median_ms': round(statistics.median(latencies), 3),
+        'p99_ms': round(latencies[int(0.99 * (len(latencies) - 1))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=16,
+                        help='размер пула ASGI')
+    parser.add_argument('--requests', type=int, default=20,
+                        help='запросов на клиента')
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--authors', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='сохранить результат в файл')
+    options = parser.parse_args()
+
+    db_path = setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.core.wsgi import get_wsgi_application
+
+    from core.asgi import ASGIHandler
+
+    settings.FEED_CACHE_TIMEOUT = 0
+    call_command('migrate', verbosity=0)
+    progress(f'База: {db_path}')
+    data = populate(options)
+    wsgi = get_wsgi_application()
+    asgi = ASGIHandler(wsgi, options.threads)
+    results = {}
+    for name, run, application in (
+        ('wsgi', run_wsgi, wsgi), ('asgi', run_asgi, asgi)
+    ):
+        progress(f'{name}: {options.clients} клиентов')
+        started = time.perf_counter()
+        latencies = run(application, data, options)
+        results[name] = summary(latencies, time.perf_counter() - started)
+    asgi.executor.shutdown()
+    for name, result in results.items():
+        print(
+            f'{name}: {result["requests"]} запросов, '
+            f'{result["rps"]} в секунду, медиана {result["median_ms"]} мс, '
+            f'p99 {result["p99_ms"]} мс'
+        )
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+    os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""Одновременная запись: post_create и add_comment из многих потоков.
+
+Каждый профиль настроек запускается в отдельном процессе на своей
+временной базе: потоки-писатели создают посты и комментарии через
+тестовый клиент (весь стек middleware и вьюх), потоки-читатели
+параллельно листают главную страницу без кеша лент.
+
+    python benchmarks/bench_concurrency.py --threads 16 --requests 50
+    python benchmarks/bench_concurrency.py \
+        --settings yatube.settings_production
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import progress, setup_django  # noqa: E402
+
+PROFILES = ('yatube.settings', 'yatube.settings_production')
+
+
+def percentile(values, q):
+    if not values:
+        return 0
+    values = sorted(values)
+    return round(values[int(q * (len(values) - 1))], 3)
+
+
+def writer(client, post_ids, options, rnd, results):
+    from django.urls import reverse
+
+    for number in range(options.requests):
+        if number % 2:
+            url = reverse('posts:add_comment', args=[rnd.choice(post_ids)])
+            data = {'text': f'Комментарий {number}'}
+        else:
+            url = reverse('posts:post_create')
+            data = {'text': f'Пост {number}'}
+        started = time.perf_counter()
+        try:
+            response = client.post(url, data)
+            failed = response.status_code >= 500
+        except Exception:
+            failed = True
+        results.append(((time.perf_counter() - started) * 1000, failed))
+
+
+def reader(client, options, results, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            failed = client.get('/').status_code >= 500
+        except Exception:
+            failed = True
+        results.append(((time.perf_counter() - started) * 1000, failed))
+
+
+def in_thread(target, *args):
+    from django.db import connections
+
+    def run():
+        try:
+            target(*args)
+        finally:
+            connections.close_all()
+    return threading.Thread(target=run)
+
+
+def summary(results, elapsed):
+    latencies = [latency for latency, _ in results]
+    return {
+        'requests': len(results),
+        'errors': sum(failed for _, failed in results),
+        'rps': round(len(results) / elapsed, 1),
+        'median_ms': round(statistics.median(latencies), 3)
+        if latencies else 0,
+        'p95_ms': percentile(latencies, 0.95),
+        'max_ms': percentile(latencies, 1),
+    }
+
+
+def worker(options):
+    db_path = setup_django(settings_module=options.settings)
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test import Client
+
+    from posts.models import Post, User
+
+    settings.FEED_CACHE_TIMEOUT = 0
+    call_command('migrate', verbosity=0)
+    progress(f'{options.settings}: {db_path}')
+    author = User.objects.create_user(username='author')
+    post_ids = [
+        Post.objects.create(text=f'Пост {i}', author=author).pk
+        for i in range(20)
+    ]
+    clients = []
+    for number in range(options.threads):
+        client = Client()
+        client.force_login(User.objects.create_user(username=f'user{number}'))
+        clients.append(client)
+    connections.close_all()
+
+    writes, reads = [], []
+    stop = threading.Event()
+    threads = [
+        in_thread(
+            writer, client, post_ids, options,
+            random.Random(options.seed + number), writes
+        )
+        for number, client in enumerate(clients)
+    ]
+    readers = [
+        in_thread(reader, Client(), options, reads, stop)
+        for _ in range(options.readers)
+    ]
+    started = time.perf_counter()
+    for thread in threads + readers:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in readers:
+        thread.join()
+    connections.close_all()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.unlink(db_path + suffix)
+    return {
+        'settings': options.settings,
+        'writes': summary(writes, elapsed),
+        'reads': summary(reads, elapsed),
+    }
+
+
+def run_profile(settings_module, options):
+    """Запускает замер профиля в отдельном процессе с чистым Django."""
+    env = {
+        key: value for key, value in os.environ.items()
+        if key != 'DJANGO_SETTINGS_MODULE'
+    }
+    command = [
+        sys.executable, os.path.abspath(__file__), '--worker',
+        '--settings', settings_module,
+        '--threads', str(options.threads),
+        '--readers', str(options.readers),
+        '--requests', str(options.requests),
+        '--seed', str(options.seed),
+    ]
+    output = subprocess.run(
+        command, env=env, check=True, stdout=subprocess.PIPE
+    ).stdout
+    return json.loads(output)
+
+
+def report(results):
+    for result in results:
+        print(f'== {result["settings"]}')
+        for kind in ('writes', 'reads'):
+            data = result[kind]
+            print(
+                f'  {kind:>6}: {data["requests"]} запросов, '
+                f'ошибок {data["errors"]}, {data["rps"]} в секунду, '
+                f'медиана {data["median_ms"]} мс, p95 {data["p95_ms"]} мс, '
+                f'максимум {data["max_ms"]} мс'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--settings', action='append',
+        help='модуль настроек (можно несколько; по умолчанию оба профиля)'
+    )
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='сохранить результат в файл')
+    parser.add_argument('--worker', action='store_true',
+                        help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.worker:
+        options.settings = options.settings[0]
+        json.dump(worker(options), sys.stdout)
+        return
+    results = [
+        run_profile(settings_module, options)
+        for settings_module in options.settings or PROFILES
+    ]
+    report(results)
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Планы запросов и тайминги лент до и после составных индексов.
+
+Генерирует отдельную базу (по умолчанию 1 000 000 постов), прогоняет
+запросы, которые выполняют ленты и страница поста, без индексов из
+миграций 0009_feed_indexes и 0012_comment_moderation, затем создаёт
+их и повторяет замеры.
+
+    python benchmarks/bench_indexes.py --posts 1000000
+    python benchmarks/bench_indexes.py --posts 50000 --json result.json
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import measure, progress, setup_django  # noqa: E402
+
+CHUNK = 50000
+FEED_INDEXES = {
+    'Post': (
+        'post_author_date_idx', 'post_group_date_idx', 'post_date_idx'
+    ),
+    'Comment': ('comment_visible_idx',),
+    'Follow': ('follow_user_author_idx',),
+}
+
+
+def feed_indexes():
+    from django.apps import apps
+
+    for model_name, names in FEED_INDEXES.items():
+        model = apps.get_model('posts', model_name)
+        for index in model._meta.indexes:
+            if index.name in names:
+                yield model, index
+
+
+def drop_feed_indexes():
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model, index in feed_indexes():
+            editor.remove_index(model, index)
+
+
+def create_feed_indexes():
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model, index in feed_indexes():
+            editor.add_index(model, index)
+        editor.execute('ANALYZE')
+
+
+def chunked_insert(cursor, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            cursor.executemany(sql, batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+
+
+def populate(options):
+    from django.db import connection, transaction
+
+    rnd = random.Random(options.seed)
+    start = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    users, groups = options.users, options.groups
+    with transaction.atomic(), connection.cursor() as cursor:
+        progress(f'Пользователи: {users}')
+        chunked_insert(cursor, (
+            'INSERT INTO auth_user (id, password, is_superuser, username, '
+            'first_name, last_name, email, is_staff, is_active, '
+            'date_joined) VALUES (%s, %s, 0, %s, %s, %s, %s, 0, 1, %s)'
+        ), (
+            (i, '!', f'user{i}', 'Имя', f'Фамилия{i}', '', start)
+            for i in range(1, users + 1)
+        ))
+        chunked_insert(cursor, (
+            'INSERT INTO posts_group (id, title, slug, description) '
+            'VALUES (%s, %s, %s, %s)'
+        ), (
+            (i, f'Группа {i}', f'group-{i}', 'Описание')
+            for i in range(1, groups + 1)
+        ))
+        progress(f'Посты: {options.posts}')
+        chunked_insert(cursor, (
+            'INSERT INTO posts_post (id, text, pub_date, updated, '
+            'author_id, group_id, image, comments_count) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s, 0)'
+        ), (
+            (
+                i, f'Пост {i}',
+                start + datetime.timedelta(seconds=i * 30),
+                start + datetime.timedelta(seconds=i * 30),
+                rnd.randint(1, users),
+                rnd.randint(1, groups) if rnd.random() < 0.7 else None,
+                '',
+            )
+            for i in range(1, options.posts + 1)
+        ))
+        progress(f'Комментарии: {options.comments}')
+        chunked_insert(cursor, (
+            'INSERT INTO posts_comment (text, pub_date, author_id, '
+            'post_id, moderation) VALUES (%s, %s, %s, %s, 0)'
+        ), (
+            (
+                'Комментарий',
+                start + datetime.timedelta(seconds=i * 7),
+                rnd.randint(1, users),
+                rnd.randint(1, options.posts),
+            )
+            for i in range(options.comments)
+        ))
+        progress(f'Подписки: {options.follows}')
+        edges = set()
+        while len(edges) < options.follows:
+            user, author = rnd.randint(1, users), rnd.randint(1, users)
+            if user != author:
+                edges.add((user, author))
+        chunked_insert(cursor, (
+            'INSERT INTO posts_follow (user_id, author_id) VALUES (%s, %s)'
+        ), sorted(edges))
+        cursor.execute('ANALYZE')
+
+
+def scenarios(options):
+    from posts.models import Comment, Post
+
+    rnd = random.Random(options.seed + 1)
+    author = rnd.randint(1, options.users)
+    group = rnd.randint(1, options.groups)
+    post = rnd.randint(1, options.posts)
+    size = 10
+    deep = min(options.posts // 2, 10000)
+    return {
+        'index: первая страница': Post.objects.feed()[:size],
+        f'index: смещение {deep}': Post.objects.feed()[deep:deep + size],
+        'group_posts': Post.objects.feed().filter(group_id=group)[:size],
+        'profile': Post.objects.feed().filter(author_id=author)[:size],
+        'follow_index': Post.objects.feed().filter(
+            author__following__user_id=author
+        )[:size],
+        'post_detail: комментарии': Comment.objects.visible().filter(
+            post_id=post
+        ).select_related('author').order_by('-pub_date', '-pk')[:size],
+    }
+
+
+def run(options):
+    results = {}
+    for name, queryset in scenarios(options).items():
+        results[name] = {
+            'plan': queryset.explain(),
+            **measure(lambda: list(queryset.all()), options.repeat),
+        }
+    return results
+
+
+def report(before, after):
+    for name in before:
+        print(f'== {name}')
+        for label, data in (('до', before[name]), ('после', after[name])):
+            print(
+                f'  {label:>5}: медиана {data["median_ms"]} мс, '
+                f'p95 {data["p95_ms"]} мс'
+            )
+            for line in data['plan'].splitlines():
+                print(f'         {line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--comments', type=int, default=300000)
+    parser.add_argument('--follows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help='файл базы (по умолчанию временный)')
+    parser.add_argument('--json', help='сохранить результат в файл')
+    options = parser.parse_args()
+
+    db_path = setup_django(options.db)
+    from django.core.management import call_command
+
+    progress(f'База: {db_path}')
+    call_command('migrate', verbosity=0)
+    drop_feed_indexes()
+    populate(options)
+    before = run(options)
+    progress('Создаю индексы')
+    create_feed_indexes()
+    after = run(options)
+    report(before, after)
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump(
+                {'before': before, 'after': after}, output,
+                ensure_ascii=False, indent=2
+            )
+    if not options.db:
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
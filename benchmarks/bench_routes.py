@@ -0,0 +1,266 @@
+"""Задержка, число SQL-запросов и память для каждого маршрута posts/urls.py.
+
+Наполняет отдельную базу командой `manage.py seed`: пользователи,
+группы, посты, комментарии и подписки, у которых число подписчиков
+автора распределено по степенному закону (немногие авторы собирают
+большую часть подписок). Затем каждый маршрут запрашивается
+тестовым клиентом Django в процессе, без сети. Результат можно
+сохранить в JSON и сравнить с прошлым прогоном, чтобы увидеть
+регрессии между коммитами.
+
+    python benchmarks/bench_routes.py --posts 20000 --json before.json
+    python benchmarks/bench_routes.py --posts 20000 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import ROOT, measure, progress, setup_django  # noqa
+
+
+def populate(options):
+    from django.core.management import call_command
+
+    call_command(
+        'seed', users=options.users, groups=options.groups,
+        posts=options.posts, comments=options.comments,
+        follows=options.follows, zipf=options.zipf, seed=options.seed,
+        stdout=sys.stderr,
+    )
+
+
+def scenarios(rnd):
+    """Маршрут -> (клиент, метод, функция, возвращающая путь и данные)."""
+    from django.test import Client
+    from django.urls import reverse
+
+    from posts.models import Follow, Group, Post, User
+
+    popular = User.objects.order_by('-stats__followers_count').first()
+    reader = User.objects.order_by('-stats__following_count').first()
+    post = Post.objects.order_by('-comments_count').first()
+    own_post = Post.objects.filter(author=reader).first() or post
+    group = Group.objects.order_by('pk').first()
+    followed = set(
+        Follow.objects.filter(user=reader).values_list('author_id', flat=True)
+    )
+    strangers = iter(User.objects.exclude(
+        pk__in=followed | {reader.pk}
+    ).values_list('username', flat=True))
+    follows = []
+    anonymous, authorized = Client(), Client()
+    authorized.force_login(reader)
+
+    def follow():
+        username = next(strangers)
+        follows.append(username)
+        return reverse('posts:profile_follow', args=[username]), None
+
+    def unfollow():
+        # Сценарий идёт после follow и отписывается от тех же авторов.
+        return reverse('posts:profile_unfollow', args=[follows.pop()]), None
+
+    def fixed(name, *args, data=None):
+        return lambda: (reverse(name, args=args), data)
+
+    return {
+        'posts:index': (anonymous, 'get', fixed('posts:index')),
+        'posts:index (авторизован)': (
+            authorized, 'get', fixed('posts:index')
+        ),
+        'posts:group_list': (
+            anonymous, 'get', fixed('posts:group_list', group.slug)
+        ),
+        'posts:post_detail': (
+            authorized, 'get', fixed('posts:post_detail', post.pk)
+        ),
+        'posts:post_comments': (
+            anonymous, 'get', fixed('posts:post_comments', post.pk)
+        ),
+        'posts:profile': (
+            authorized, 'get', fixed('posts:profile', popular.username)
+        ),
+        'posts:post_create': (
+            authorized, 'post', fixed(
+                'posts:post_create', data={'text': 'Новый пост из замера'}
+            )
+        ),
+        'posts:post_edit': (
+            authorized, 'post', fixed(
+                'posts:post_edit', own_post.pk,
+                data={'text': 'Исправленный пост'}
+            )
+        ),
+        'posts:add_comment': (
+            authorized, 'post', fixed(
+                'posts:add_comment', post.pk, data={'text': 'Ещё ответ'}
+            )
+        ),
+        'posts:follow_index': (
+            authorized, 'get', fixed('posts:follow_index')
+        ),
+        'posts:search': (
+            anonymous, 'get', lambda: (
+                reverse('posts:search'),
+                {'q': rnd.choice(('погода', 'книга кот', 'утро', 'мост'))},
+            )
+        ),
+        'posts:profile_follow': (authorized, 'get', follow),
+        'posts:profile_unfollow': (authorized, 'get', unfollow),
+    }
+
+
+def uncovered(names):
+    """Маршруты posts/urls.py, для которых нет сценария."""
+    from posts.urls import app_name, urlpatterns
+
+    covered = {name.split(' ')[0] for name in names}
+    return sorted(
+        f'{app_name}:{pattern.name}' for pattern in urlpatterns
+        if f'{app_name}:{pattern.name}' not in covered
+    )
+
+
+def run(options):
+    from django.db import connection
+
+    results = {}
+    for name, (client, method, request) in scenarios(
+        random.Random(options.seed + 1)
+    ).items():
+        def call():
+            path, data = request()
+            response = getattr(client, method)(path, data)
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name}: ответ {response.status_code}')
+            return response
+
+        call()  # прогрев: шаблоны, кеши соединения
+        timings = measure(call, options.repeat)
+        queries = []
+        with connection.execute_wrapper(
+            lambda execute, sql, *args: queries.append(sql) or execute(
+                sql, *args
+            )
+        ):
+            call()
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            **timings,
+            'queries': len(queries),
+            'peak_kib': round(peak / 1024, 1),
+        }
+        progress(f'{name}: медиана {timings["median_ms"]} мс')
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results, baseline=None, threshold=0.2):
+    """Печатает таблицу; возвращает число регрессий против baseline.
+
+    Замедление считается по лучшему времени: оно меньше всего зависит
+    от фонового шума машины.
+    """
+    regressions = 0
+    print(f'{"маршрут":<28} {"медиана":>9} {"p95":>9} {"SQL":>4} '
+          f'{"KiB":>8}')
+    for name, data in results.items():
+        line = (
+            f'{name:<28} {data["median_ms"]:>9} {data["p95_ms"]:>9} '
+            f'{data["queries"]:>4} {data["peak_kib"]:>8}'
+        )
+        old = (baseline or {}).get(name)
+        if old:
+            slower = data['best_ms'] / old['best_ms'] - 1
+            line += f'  {slower:+.0%}'
+            if data['queries'] != old['queries']:
+                line += f'  SQL было {old["queries"]}'
+            if slower > threshold or data['queries'] > old['queries']:
+                line += '  <- регрессия'
+                regressions += 1
+        print(line)
+    return regressions
+
+
+DATASET_OPTIONS = ('users', 'groups', 'posts', 'comments', 'follows', 'zipf',
+                   'seed')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--follows', type=int, default=30000)
+    parser.add_argument('--zipf', type=float, default=1.1,
+                        help='показатель степенного закона')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help='файл базы (по умолчанию временный)')
+    parser.add_argument('--json', help='сохранить результат в файл')
+    parser.add_argument('--compare', help='JSON прошлого прогона')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='допустимое замедление, доля')
+    options = parser.parse_args()
+
+    db_path = setup_django(options.db)
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    # Замеряется сама вьюха, а не кеш лент и не лимиты записи.
+    settings.FEED_CACHE_TIMEOUT = 0
+    settings.RATE_LIMITS = {}
+    progress(f'База: {db_path}')
+    call_command('migrate', verbosity=0)
+    populate(options)
+    results = run(options)
+    missing = uncovered(results)
+    if missing:
+        progress(f'Без сценария: {", ".join(missing)}')
+    baseline = None
+    if options.compare:
+        with open(options.compare) as source:
+            previous = json.load(source)
+        baseline = previous['routes']
+        for option in DATASET_OPTIONS:
+            if previous['options'][option] != getattr(options, option):
+                progress(f'Внимание: --{option} отличается от прогона '
+                         f'{previous["revision"]}')
+    regressions = report(results, baseline, options.threshold)
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump({
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'options': vars(options),
+                'routes': results,
+            }, output, ensure_ascii=False, indent=2)
+    if not options.db:
+        os.unlink(db_path)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Поиск по постам: LIKE '%...%' против FTS5 и индекса в памяти.
+
+Генерирует отдельную базу с постами из случайных слов и для каждого
+запроса замеряет первую страницу выдачи: фильтр text__icontains,
+индекс FTS5 из миграции 0010_post_fts и MemoryIndex.
+
+    python benchmarks/bench_search.py --posts 200000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import measure, progress, setup_django  # noqa: E402
+
+CHUNK = 50000
+SYLLABLES = (
+    'ко', 'ра', 'ми', 'то', 'ле', 'на', 'су', 'вы', 'ду', 'шо',
+    'пе', 'ба', 'ги', 'зо', 'лу', 'ре', 'ча', 'фи', 'жу', 'хо',
+)
+
+
+def vocabulary(rnd, size):
+    """size разных псевдослов: номер слова в системе слогов."""
+    words = []
+    for number in range(len(SYLLABLES), len(SYLLABLES) + size):
+        syllables = []
+        while number:
+            number, digit = divmod(number, len(SYLLABLES))
+            syllables.append(SYLLABLES[digit])
+        words.append(''.join(syllables))
+    rnd.shuffle(words)
+    return words
+
+
+def populate(options):
+    from django.db import connection, transaction
+
+    rnd = random.Random(options.seed)
+    words = vocabulary(rnd, options.words)
+    # Частоты слов по закону Ципфа, как в живом тексте.
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    start = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    rows = (
+        (
+            i, ' '.join(rnd.choices(words, weights, k=rnd.randint(5, 60))),
+            start + datetime.timedelta(seconds=i * 30),
+            start + datetime.timedelta(seconds=i * 30),
+        )
+        for i in range(1, options.posts + 1)
+    )
+    progress(f'Посты: {options.posts}')
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO auth_user (id, password, is_superuser, username, "
+            "first_name, last_name, email, is_staff, is_active, date_joined) "
+            "VALUES (1, '!', 0, 'author', '', '', '', 0, 1, %s)", [start]
+        )
+        sql = (
+            'INSERT INTO posts_post (id, text, pub_date, updated, author_id, '
+            "image, comments_count) VALUES (%s, %s, %s, %s, 1, '', 0)"
+        )
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == CHUNK:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+        cursor.execute('ANALYZE')
+    return words
+
+
+def queries(words):
+    """Частое, среднее и редкое слово, префикс и пара слов."""
+    return {
+        'частое слово': words[0],
+        'среднее слово': words[len(words) // 10],
+        'редкое слово': words[-1],
+        'префикс': words[len(words) // 2][:3],
+        'два слова': f'{words[1]} {words[2]}',
+    }
+
+
+def memory_search(index, query, size):
+    # Без запомненного ранжирования: замеряем сам поиск, а не повтор.
+    index._last = None
+    return index.count(query), index.ids(query, 0, size)
+
+
+def run(options, words):
+    from posts import search
+    from posts.models import Post
+
+    size = 10
+    progress('Строю индекс в памяти')
+    build = measure(search.memory_index.build, 1)
+    fts = search.FtsIndex()
+    results = {'memory_index_build_ms': build['best_ms']}
+    for name, query in queries(words).items():
+        like = Post.objects.feed()
+        for word in query.split():
+            like = like.filter(text__icontains=word)
+        backends = {
+            'icontains': lambda: (like.count(), list(like[:size])),
+            'fts5': lambda: (fts.count(query), fts.ids(query, 0, size)),
+            'python': lambda: memory_search(search.memory_index, query, size),
+        }
+        results[name] = {
+            'query': query,
+            'found': fts.count(query),
+            **{
+                backend: measure(func, options.repeat)
+                for backend, func in backends.items()
+            },
+        }
+    return results
+
+
+def report(results):
+    print(f'Индекс в памяти построен за {results["memory_index_build_ms"]} мс')
+    for name, data in results.items():
+        if not isinstance(data, dict):
+            continue
+        print(f'== {name}: «{data["query"]}», найдено {data["found"]}')
+        for backend in ('icontains', 'fts5', 'python'):
+            print(
+                f'  {backend:>9}: медиана {data[backend]["median_ms"]} мс, '
+                f'p95 {data[backend]["p95_ms"]} мс'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200000)
+    parser.add_argument('--words', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help='файл базы (по умолчанию временный)')
+    parser.add_argument('--json', help='сохранить результат в файл')
+    options = parser.parse_args()
+
+    db_path = setup_django(options.db)
+    from django.core.management import call_command
+
+    progress(f'База: {db_path}')
+    call_command('migrate', verbosity=0)
+    words = populate(options)
+    results = run(options, words)
+    report(results)
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+    if not options.db:
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Общая обвязка скриптов замеров: Django на отдельной базе SQLite."""
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT, 'yatube')
+
+
+def setup_django(db_path=None, settings_module='yatube.settings'):
+    """Поднимает Django с базой db_path (по умолчанию во временном файле).
+
+    Рабочая db.sqlite3 проекта не затрагивается.
+    """
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    from django.conf import settings
+
+    if db_path is None:
+        handle, db_path = tempfile.mkstemp(
+            prefix='yatube-bench-', suffix='.sqlite3'
+        )
+        os.close(handle)
+        os.unlink(db_path)
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    django.setup()
+    return db_path
+
+
+def measure(func, repeat=5):
+    """Запускает func repeat раз и возвращает тайминги в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'best_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        # Ближайший ранг: при малом repeat p95 не ниже медианы.
+        'p95_ms': round(timings[math.ceil(0.95 * len(timings)) - 1], 3),
+    }
+
+
+def progress(message):
+    print(message, file=sys.stderr, flush=True)
@@ -0,0 +1,148 @@
+"""ASGI-обёртка над WSGI-приложением Django.
+
+Django 2.2 не умеет обрабатывать запросы асинхронно, поэтому запрос
+из ASGI-сервера превращается в WSGI environ и целиком, со всеми
+middleware, вьюхой и рендерингом шаблона, выполняется в пуле потоков
+ограниченного размера. Цикл событий сервера не блокируется медленными
+запросами к базе и продолжает принимать соединения; лишние запросы
+ждут свободный поток в очереди пула. Тело ответа уходит серверу
+по частям, как его отдаёт итератор ответа: потоковые ответы и файлы
+не собираются в памяти целиком.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-запроса ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI хранит байты пути в строке latin-1.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            # Несколько Cookie склеиваются через '; ', остальное — через ','.
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{environ[name]}{separator}{value}'
+        environ[name] = value
+    return environ
+
+
+class ASGIHandler:
+
+    def __init__(self, wsgi_application, max_workers):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Тип соединения {scope["type"]} не поддержан')
+        body = await self.read_body(receive)
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            # Поток ждёт отправки каждой части: медленный клиент
+            # не копит ответ в памяти.
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        try:
+            await loop.run_in_executor(
+                self.executor, self.run, build_environ(scope, body),
+                send_from_thread,
+            )
+        finally:
+            body.close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        # Крупные загрузки уходят на диск, как и в обычном WSGI-сервере.
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+        return body
+
+    def run(self, environ, send):
+        """Выполняет запрос в потоке пула и отдаёт ответ по частям.
+
+        Итератор ответа читается и закрывается в том же потоке:
+        request_finished закрывает соединения с базой именно этого
+        потока. Последняя часть придерживается, чтобы отправить её
+        с more_body=False, поэтому обычный ответ — одно сообщение.
+        """
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, headers]
+
+        response = self.wsgi_application(environ, start_response)
+        try:
+            status, headers = started
+            send({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [
+                    (name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in headers
+                ],
+            })
+            pending = b''
+            for chunk in response:
+                if not chunk:
+                    continue
+                if pending:
+                    send({
+                        'type': 'http.response.body',
+                        'body': pending,
+                        'more_body': True,
+                    })
+                pending = chunk
+            send({'type': 'http.response.body', 'body': pending})
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
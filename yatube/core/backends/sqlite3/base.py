@@ -0,0 +1,77 @@
+"""SQLite, настроенный под одновременную запись из нескольких потоков.
+
+Помимо параметров sqlite3.connect() (например, timeout — сколько
+секунд ждать снятия блокировки), OPTIONS понимает:
+
+    pragmas — PRAGMA, которые выполняются на каждом новом соединении;
+    transaction_mode — 'IMMEDIATE' берёт блокировку записи в начале
+        atomic(), а не при первом INSERT: пишущие транзакции ждут друг
+        друга по timeout вместо мгновенного "database is locked";
+    pool_size — сколько закрытых соединений держать для повторного
+        использования новыми потоками.
+"""
+import queue
+import threading
+
+from django.db.backends.sqlite3 import base
+
+CUSTOM_OPTIONS = ('pragmas', 'transaction_mode', 'pool_size')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def options(self):
+        return self.settings_dict['OPTIONS']
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in CUSTOM_OPTIONS:
+            params.pop(option, None)
+        return params
+
+    def pool(self):
+        """Очередь свободных соединений или None, если пул выключен."""
+        size = self.options.get('pool_size')
+        if not size or self.is_in_memory_db():
+            return None
+        with _pools_lock:
+            return _pools.setdefault(
+                self.settings_dict['NAME'], queue.LifoQueue(size)
+            )
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool()
+        if pool is not None:
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                pass
+            else:
+                conn.execute('PRAGMA foreign_keys = ON')
+                return conn
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.options.get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def _close(self):
+        pool = self.pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+        try:
+            pool.put_nowait(self.connection)
+        except queue.Full:
+            super()._close()
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.options.get('transaction_mode')
+        if not mode:
+            return super()._start_transaction_under_autocommit()
+        self.cursor().execute(f'BEGIN {mode}')
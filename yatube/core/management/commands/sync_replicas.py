@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики из DATABASE_REPLICAS '
+        'через online backup.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='повторять каждые N секунд, пока не прервут'
+        )
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError('DATABASE_REPLICAS пуст')
+        for alias in ('default', *replicas):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias}: поддерживается только SQLite')
+        while True:
+            for alias in replicas:
+                self.sync(alias)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self, alias):
+        source, target = connections['default'], connections[alias]
+        source.ensure_connection()
+        target.ensure_connection()
+        started = time.perf_counter()
+        source.connection.backup(target.connection)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f'{alias}: скопировано за {elapsed:.0f} мс')
@@ -0,0 +1,123 @@
+"""Метрики запросов: число SQL-запросов, время SQL, шаблонов и ответа.
+
+Значения копятся по каждой вьюхе в гистограммах внутри процесса,
+поэтому у каждого воркера своя статистика, и после перезапуска она
+начинается заново. Снимок отдаёт вьюха core.views.metrics.
+"""
+import bisect
+import threading
+
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+TIME_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+METRICS = {
+    'queries': QUERY_BUCKETS,
+    'sql_ms': TIME_BUCKETS_MS,
+    'template_ms': TIME_BUCKETS_MS,
+    'total_ms': TIME_BUCKETS_MS,
+}
+
+
+class QueryBudgetExceeded(Exception):
+    """Вьюха сделала больше запросов, чем разрешено QUERY_BUDGETS."""
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Верхняя граница корзины, в которую попал q-квантиль."""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bound, hits in zip(self.bounds, self.buckets):
+            seen += hits
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else 0,
+            'max': round(self.max, 3),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip(
+                [str(bound) for bound in self.bounds] + ['inf'],
+                self.buckets
+            )),
+        }
+
+
+_lock = threading.Lock()
+_views = {}
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Метрики одного запроса, которые собирает middleware."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.total_ms = 0.0
+
+    def as_dict(self):
+        return {metric: getattr(self, metric) for metric in METRICS}
+
+
+def start():
+    _local.current = RequestMetrics()
+    return _local.current
+
+
+def current():
+    """Метрики обрабатываемого запроса или None вне middleware."""
+    return getattr(_local, 'current', None)
+
+
+def finish():
+    _local.current = None
+
+
+def record(view_name, request_metrics):
+    values = request_metrics.as_dict()
+    with _lock:
+        histograms = _views.setdefault(view_name, {
+            metric: Histogram(bounds) for metric, bounds in METRICS.items()
+        })
+        for metric, value in values.items():
+            histograms[metric].observe(value)
+
+
+def snapshot():
+    with _lock:
+        return {
+            view_name: {
+                metric: histogram.as_dict()
+                for metric, histogram in histograms.items()
+            }
+            for view_name, histograms in sorted(_views.items())
+        }
+
+
+def reset():
+    with _lock:
+        _views.clear()
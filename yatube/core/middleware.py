@@ -0,0 +1,177 @@
+import contextlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.shortcuts import render
+
+from core import metrics, ratelimit, routers
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL-запросы и время ответа каждой вьюхи.
+
+    Результат копится в core.metrics, уходит клиенту заголовком
+    Server-Timing и сверяется с бюджетом запросов QUERY_BUDGETS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        request_metrics = metrics.start()
+        started = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(self.count_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish()
+        request_metrics.total_ms = (time.perf_counter() - started) * 1000
+        view_name = self.view_name(request)
+        metrics.record(view_name, request_metrics)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = self.server_timing(request_metrics)
+        self.check_budget(view_name, request_metrics.queries)
+        return response
+
+    @staticmethod
+    def count_query(execute, sql, params, many, context):
+        request_metrics = metrics.current()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if request_metrics is not None:
+                request_metrics.queries += 1
+                request_metrics.sql_ms += (
+                    time.perf_counter() - started
+                ) * 1000
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match else 'unresolved'
+
+    @staticmethod
+    def server_timing(request_metrics):
+        return ', '.join((
+            f'sql;dur={request_metrics.sql_ms:.2f};'
+            f'desc="{request_metrics.queries} queries"',
+            f'tpl;dur={request_metrics.template_ms:.2f}',
+            f'total;dur={request_metrics.total_ms:.2f}',
+        ))
+
+    @staticmethod
+    def check_budget(view_name, queries):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is None or queries <= budget:
+            return
+        message = (
+            f'{view_name}: {queries} SQL-запросов при бюджете {budget}'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise metrics.QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaMiddleware:
+    """Пускает чтение лент на реплики и закрепляет писавших за основной.
+
+    После запроса с записью клиент получает подписанную cookie, и пока
+    она жива, его запросы читают с основной базы.
+    """
+
+    cookie_name = 'primary_db'
+    safe_methods = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        try:
+            response = self.get_response(request)
+            if routers.wrote():
+                response.set_signed_cookie(
+                    self.cookie_name, '1', salt=self.cookie_name,
+                    max_age=settings.REPLICA_STICKY_SECONDS, httponly=True
+                )
+        finally:
+            routers.reset()
+        return response
+
+    def is_pinned(self, request):
+        try:
+            request.get_signed_cookie(
+                self.cookie_name, salt=self.cookie_name,
+                max_age=settings.REPLICA_STICKY_SECONDS
+            )
+        except (KeyError, signing.BadSignature):
+            return False
+        return True
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in self.safe_methods
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and not self.is_pinned(request)
+        ):
+            routers.use_replicas()
+
+
+class RateLimitMiddleware:
+    """Ограничивает запись во вьюхи из RATE_LIMITS.
+
+    Запросы сверх лимита получают 429 с заголовком Retry-After. Чтение
+    (GET, HEAD, OPTIONS) не ограничивается, если у вьюхи в RATE_LIMITS
+    не перечислены методы явно: подписка пишет и по GET.
+    """
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        rate = self.rate(view_name, request.method)
+        if rate is None:
+            return None
+        wait = ratelimit.acquire(
+            ratelimit.client_keys(request, view_name), rate
+        )
+        if not wait:
+            return None
+        retry_after = math.ceil(wait)
+        logger.warning(f'{view_name}: лимит {rate} исчерпан')
+        response = render(
+            request, 'core/429.html', {'retry_after': retry_after},
+            status=429
+        )
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    def rate(self, view_name, method):
+        """Лимит вьюхи для метода запроса или None."""
+        rate = settings.RATE_LIMITS.get(view_name)
+        if isinstance(rate, (list, tuple)):
+            rate, methods = rate
+            return rate if method in methods else None
+        if rate is None or method in self.safe_methods:
+            return None
+        return rate
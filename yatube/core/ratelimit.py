@@ -0,0 +1,61 @@
+"""Ограничение частоты запросов на запись: token bucket в кеше.
+
+Бакет вмещает столько жетонов, сколько запросов разрешено за период,
+и пополняется равномерно. Состояние (жетоны, время) лежит в кеше
+RATE_LIMIT_CACHE_ALIAS и живёт период: истёкший ключ — полный бакет.
+Чтение и запись бакета атомарны внутри процесса; между процессами
+с общим кешем возможен редкий лишний пропуск при гонке.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def _cache():
+    return caches[settings.RATE_LIMIT_CACHE_ALIAS]
+
+
+def acquire(keys, rate):
+    """Берёт по жетону из каждого бакета keys.
+
+    Возвращает 0, если запрос пропущен, иначе — сколько секунд ждать
+    жетона. При отказе жетоны не списываются ни из одного бакета.
+    """
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    cache = _cache()
+    now = time.time()
+    with _lock:
+        states = cache.get_many(keys)
+        buckets = {}
+        for key in keys:
+            tokens, stamp = states.get(key, (capacity, now))
+            buckets[key] = min(capacity, tokens + (now - stamp) * refill)
+        wait = max((1 - tokens) / refill for tokens in buckets.values())
+        if wait > 0:
+            return wait
+        cache.set_many(
+            {key: (tokens - 1, now) for key, tokens in buckets.items()},
+            period
+        )
+    return 0
+
+
+def client_keys(request, scope):
+    """Бакеты запроса: по IP и, для вошедших, по пользователю."""
+    keys = [f'ratelimit:{scope}:ip:{request.META.get("REMOTE_ADDR", "")}']
+    if request.user.is_authenticated:
+        keys.append(f'ratelimit:{scope}:user:{request.user.pk}')
+    return keys
@@ -0,0 +1,60 @@
+"""Чтение лент с реплик базы.
+
+Реплики включаются списком DATABASE_REPLICAS. ReplicaMiddleware
+разрешает чтение с них только на время GET/HEAD-запросов к вьюхам
+из REPLICA_VIEWS. Реплика отстаёт от основной базы, поэтому
+пользователь, который только что что-то записал, ещё
+REPLICA_STICKY_SECONDS читает с основной базы (read-your-writes).
+Сессии и пользователи всегда читаются с основной базы: с реплики идут
+только модели приложения posts. По той же причине только их запись
+закрепляет пользователя за основной базой: сессия или кеш миниатюр
+sorl, записанные при чтении ленты, на реплики не влияют.
+"""
+import random
+import threading
+
+from django.conf import settings
+
+REPLICA_APPS = {'posts'}
+
+_state = threading.local()
+
+
+def reset():
+    _state.use_replicas = False
+    _state.wrote = False
+
+
+def use_replicas():
+    """Разрешает текущему потоку читать с реплик."""
+    _state.use_replicas = True
+
+
+def wrote():
+    """Была ли запись в текущем потоке после reset()."""
+    return getattr(_state, 'wrote', False)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            replicas
+            and getattr(_state, 'use_replicas', False)
+            and model._meta.app_label in REPLICA_APPS
+        ):
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in REPLICA_APPS:
+            _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными (sync_replicas).
+        return db == 'default'
@@ -0,0 +1,171 @@
+"""Хранилища медиафайлов.
+
+ContentAddressedStorage называет файлы по хешу содержимого, поэтому
+одинаковые картинки лежат на диске один раз. MemoryStorage держит
+файлы в памяти процесса — для тестов.
+"""
+import hashlib
+import os
+import posixpath
+import threading
+
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import (
+    FileSystemStorage, Storage, default_storage
+)
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+_volumes = {}
+_lock = threading.Lock()
+
+
+def _clean(name):
+    return posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+
+
+def walk(storage, path):
+    """Все файлы каталога хранилища, включая вложенные."""
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name)
+    for directory in directories:
+        yield from walk(storage, os.path.join(path, directory))
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """Файлы под SHA-256 содержимого поверх default_storage.
+
+    Имя 'posts/cat.jpg' превращается в 'posts/ab/cd/abcd….jpg'. Хеш
+    считается по частям файла, без чтения его в память целиком; если
+    такой файл уже сохранён, save() просто возвращает его имя. Один
+    файл может принадлежать многим записям, поэтому удалять его
+    вправе только сборщик мусора (posts.media), а не отдельная запись.
+    Где и как лежат байты, решает default_storage (DEFAULT_FILE_STORAGE).
+    """
+
+    @property
+    def backend(self):
+        return default_storage
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        return posixpath.join(
+            posixpath.dirname(name), digest[:2], digest[2:4],
+            digest + os.path.splitext(name)[1].lower()
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.backend.exists(name):
+            return name
+        return self.backend.save(name, content, max_length=max_length)
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def delete(self, name):
+        self.backend.delete(name)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+class MemoryStorage(FileSystemStorage):
+    """Файлы в словаре процесса; в Django 2.2 своего InMemoryStorage нет.
+
+    Словарь отдельный для каждого MEDIA_ROOT: override_settings в тесте
+    по-прежнему даёт чистое хранилище, а все экземпляры класса
+    (default_storage, хранилище миниатюр sorl) видят одни и те же файлы.
+    URL строится от MEDIA_URL, как у FileSystemStorage, а path(),
+    как у хранилищ без локальных файлов, недоступен.
+    """
+
+    @property
+    def _files(self):
+        with _lock:
+            return _volumes.setdefault(self.location, {})
+
+    def _open(self, name, mode='rb'):
+        try:
+            content, _ = self._files[_clean(name)]
+        except KeyError:
+            raise FileNotFoundError(name)
+        return ContentFile(content, name=name)
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        data = b''.join(
+            chunk.encode() if isinstance(chunk, str) else chunk
+            for chunk in content.chunks()
+        )
+        self._files[_clean(name)] = (data, timezone.now())
+        return name
+
+    def delete(self, name):
+        self._files.pop(_clean(name), None)
+
+    def exists(self, name):
+        # Каталог существует, пока в нём есть хоть один файл.
+        name = _clean(name)
+        return name in self._files or any(
+            other.startswith(name + '/') for other in list(self._files)
+        )
+
+    def listdir(self, path):
+        prefix = _clean(path)
+        prefix = '' if prefix == '.' else prefix + '/'
+        directories, files = set(), []
+        for name in list(self._files):
+            if not name.startswith(prefix):
+                continue
+            head, _, tail = name[len(prefix):].partition('/')
+            if tail:
+                directories.add(head)
+            else:
+                files.append(head)
+        return sorted(directories), sorted(files)
+
+    # У файлов в памяти нет пути на диске: вместо пути внутри MEDIA_ROOT
+    # от FileSystemStorage — NotImplementedError базового Storage, как
+    # у любого хранилища без локальных файлов.
+    path = Storage.path
+
+    def size(self, name):
+        return len(self._files[_clean(name)][0])
+
+    def get_modified_time(self, name):
+        return self._files[_clean(name)][1]
+
+    get_created_time = get_accessed_time = get_modified_time
+
+    @classmethod
+    def clear(cls):
+        """Удаляет файлы всех хранилищ в памяти."""
+        with _lock:
+            _volumes.clear()
@@ -0,0 +1,34 @@
+"""Бэкенд шаблонов Django, который замеряет время рендеринга."""
+import time
+
+from django.template.backends import django
+
+from core import metrics
+
+
+class Template(django.Template):
+
+    def render(self, context=None, request=None):
+        request_metrics = metrics.current()
+        if request_metrics is None:
+            return super().render(context, request)
+        # Вложенный рендер (render_to_string внутри тега) уже учтён внешним.
+        request_metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            request_metrics.template_depth -= 1
+            if not request_metrics.template_depth:
+                request_metrics.template_ms += (
+                    time.perf_counter() - started
+                ) * 1000
+
+
+class DjangoTemplates(django.DjangoTemplates):
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
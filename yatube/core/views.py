@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from core.metrics import snapshot
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +15,10 @@ def csrf_failure(request, reason=''):
 
 def internal_server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+@staff_member_required
+def metrics(request):
+    return JsonResponse(
+        snapshot(), json_dumps_params={'ensure_ascii': False, 'indent': 2}
+    )
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from posts import moderation
 from posts.models import Post, Group, Comment, Follow
 
 
@@ -32,6 +33,21 @@ class CommentAdmin(admin.ModelAdmin):
         'post',
         'moderation',
     )
+    list_filter = ('moderation',)
+    list_select_related = ('author', 'post')
+    # Статус меняют только действия: они же пересчитывают счётчики.
+    readonly_fields = ('moderation',)
+    actions = ('approve', 'reject')
+
+    def approve(self, request, queryset):
+        approved = moderation.approve(queryset)
+        self.message_user(request, f'Одобрено комментариев: {approved}')
+    approve.short_description = 'Одобрить выбранные комментарии'
+
+    def reject(self, request, queryset):
+        rejected = moderation.reject(queryset)
+        self.message_user(request, f'Отклонено комментариев: {rejected}')
+    reject.short_description = 'Отклонить выбранные комментарии'
 
 
 class FollowAdmin(admin.ModelAdmin):
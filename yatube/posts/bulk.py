@@ -0,0 +1,59 @@
+"""Массовая загрузка постов и комментариев в обход ORM-сигналов.
+
+bulk_create не вызывает сигналы, поэтому счётчики, в том числе
+ссылок на картинки, ленты подписок, кеш лент и индекс поиска в памяти
+после загрузки приводятся в порядок одним вызовом after_load().
+Индекс FTS5 обновляют триггеры базы, им сигналы не нужны.
+"""
+import contextlib
+
+from django.db import connection
+from django.db.models import Max
+
+from posts import (
+    counters, feed_cache, feed_state, media, search, timeline
+)
+from posts.models import Comment, Post
+
+
+@contextlib.contextmanager
+def keep_pub_date():
+    """Сохраняет pub_date, заданные при загрузке, вместо текущего времени.
+
+    Меняет поля моделей на время блока, поэтому подходит только для
+    команд управления, а не для кода, который работает в веб-процессе.
+    """
+    fields = [model._meta.get_field('pub_date') for model in (Post, Comment)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def assign_pks(objects):
+    """Проставляет id заранее, если база не возвращает их из bulk_create.
+
+    Нужно, чтобы сослаться на только что загруженные посты из
+    комментариев. Вызывать внутри транзакции, в которой идёт вставка.
+    """
+    if connection.features.can_return_ids_from_bulk_insert or not objects:
+        return
+    model = type(objects[0])
+    last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    for pk, obj in enumerate(objects, start=last + 1):
+        obj.pk = pk
+
+
+def after_load():
+    """Приводит производные данные в порядок; возвращает исправления."""
+    fixed = counters.reconcile()
+    fixed['media_refs'] = media.reconcile()
+    if timeline.is_enabled():
+        timeline.rebuild()
+    search.memory_index.reset()
+    feed_cache.invalidate_all()
+    feed_state.touch_all()
+    return fixed
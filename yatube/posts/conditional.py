@@ -0,0 +1,111 @@
+"""Условные GET для лент и страницы поста.
+
+Валидаторы дешевле рендеринга и берутся из базы, поэтому одинаковы во
+всех процессах: у лент это версии из posts.feed_state (их меняют
+записи, в том числе удаления, а чтение — поиск по первичному ключу
+без агрегатов по постам), у поста — строка с полем updated. Страница
+зависит от читателя (шапка, форма комментария, кнопка подписки),
+поэтому его id входит в ETag, а Last-Modified отдаётся только гостям:
+дата одна на всех читателей.
+"""
+import hashlib
+
+from django.views.decorators.http import condition
+
+from posts import feed_cache, feed_state
+from posts.models import Post
+
+
+def _etag(*parts):
+    return hashlib.md5(
+        ':'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def _reader(request):
+    return request.user.pk if request.user.is_authenticated else ''
+
+
+def _latest(*stamps):
+    stamps = [stamp for stamp in stamps if stamp is not None]
+    return max(stamps) if stamps else None
+
+
+def _row(request, fetch):
+    """Строка валидаторов; ETag и Last-Modified делят один запрос."""
+    if not hasattr(request, '_conditional_row'):
+        request._conditional_row = fetch()
+    return request._conditional_row
+
+
+def _for_guests(last_modified):
+    """Last-Modified без читателя в ключе годится только для гостей."""
+
+    def func(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return last_modified(request, *args, **kwargs)
+    return func
+
+
+def _feed(request, feed, arg=''):
+    return _row(request, lambda: feed_state.state(feed, arg))
+
+
+def _feed_etag(request, feed, arg=''):
+    versions, _ = _feed(request, feed, arg)
+    return _etag(
+        feed, arg, *versions, _reader(request),
+        feed_cache.page_params(request),
+    )
+
+
+def index_etag(request):
+    return _feed_etag(request, 'index')
+
+
+def group_etag(request, slug):
+    return _feed_etag(request, 'group_posts', slug)
+
+
+def profile_etag(request, username):
+    return _feed_etag(request, 'profile', username)
+
+
+def profile_last_modified(request, username):
+    _, updated = _feed(request, 'profile', username)
+    return updated
+
+
+def _post(request, post_id):
+    return _row(request, Post.objects.filter(pk=post_id).values_list(
+        'updated', 'author__stats__updated', 'author__stats__posts_count',
+        'group__title',
+    ).first)
+
+
+def post_etag(request, post_id):
+    post = _post(request, post_id)
+    return post and _etag(
+        *post, _reader(request), feed_cache.page_params(request),
+        request.GET.get('format', ''),
+    )
+
+
+def post_last_modified(request, post_id):
+    post = _post(request, post_id)
+    return post and _latest(*post[:2])
+
+
+# index и ленты групп меняются чаще, чем раз в секунду, а Last-Modified
+# точен до секунды, поэтому они отвечают 304 только по ETag.
+index_condition = condition(etag_func=index_etag)
+group_condition = condition(etag_func=group_etag)
+profile_condition = condition(
+    etag_func=profile_etag,
+    last_modified_func=_for_guests(profile_last_modified),
+)
+post_condition = condition(
+    etag_func=post_etag,
+    last_modified_func=_for_guests(post_last_modified),
+)
@@ -0,0 +1,86 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарным UPDATE ... SET x = x ± 1 в той же
+транзакции, что и сама запись, поэтому страницы выводят статистику
+без агрегирующих запросов. Расхождения, накопившиеся после массовых
+загрузок или правок в обход ORM, исправляет reconcile().
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from posts.models import AuthorStats, Comment, Follow, Post, User
+
+
+def _bump(queryset, field, delta):
+    # update() не трогает auto_now, а от updated зависят ответы 304.
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gt': 0})
+    return queryset.update(
+        **{field: F(field) + delta}, updated=timezone.now()
+    )
+
+
+def bump_author(user_id, field, delta):
+    # Строку статистики заводит сигнал создания пользователя; авторов
+    # без неё (bulk_create, loaddata) догоняет reconcile().
+    _bump(AuthorStats.objects.filter(user_id=user_id), field, delta)
+
+
+def bump_post(post_id, delta):
+    _bump(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def _count_of(model, related, **filters):
+    """Подзапрос: число строк model, ссылающихся на внешнюю строку."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{related: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(related)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+AUTHOR_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def _fix(queryset, field, actual):
+    """Исправляет расходящиеся значения и возвращает их количество."""
+    drifted = queryset.annotate(actual=actual).exclude(**{field: F('actual')})
+    total = drifted.count()
+    if total:
+        queryset.filter(pk__in=drifted.values('pk')).update(
+            **{field: actual}, updated=timezone.now()
+        )
+    return total
+
+
+def recount_posts(post_ids=None):
+    """Пересчитывает comments_count: только видимые комментарии."""
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    return _fix(
+        posts, 'comments_count', _count_of(Comment, 'post', moderation=False)
+    )
+
+
+def reconcile():
+    """Сверяет все счётчики с базой; возвращает число исправлений."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=pk) for pk in missing.iterator()]
+    )
+    fixed = {'comments_count': recount_posts()}
+    for field, (model, related) in AUTHOR_COUNTERS.items():
+        fixed[field] = _fix(
+            AuthorStats.objects.all(), field, _count_of(model, related)
+        )
+    return fixed
@@ -0,0 +1,109 @@
+"""Кеш отрендеренных страниц лент для анонимных читателей.
+
+Ключ фрагмента состоит из ленты, её аргумента (slug группы или имя
+автора), версии этой ленты и параметров страницы. Сброс ленты — это
+новая версия: старые фрагменты просто перестают запрашиваться и
+вытесняются бэкендом по таймауту. Версии хранятся в том же кеше,
+поэтому сброс виден всем процессам, если бэкенд общий (файловый или
+в БД), а не locmem.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+PAGE_PARAMS = ('page', 'after', 'before')
+HITS_KEY = 'feed:stats:hits'
+MISSES_KEY = 'feed:stats:misses'
+
+
+def _cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def _version(key):
+    cache = _cache()
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key)
+    return version
+
+
+def _digest(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _feed_version_key(feed, arg):
+    return f'feed:version:{feed}:{_digest(arg)}'
+
+
+def page_params(request):
+    return '&'.join(
+        f'{param}={request.GET[param]}'
+        for param in PAGE_PARAMS if param in request.GET
+    )
+
+
+def versions(feed, arg=''):
+    """Общая версия всех лент и версия одной ленты."""
+    return _version('feed:version'), _version(_feed_version_key(feed, arg))
+
+
+def fragment_key(feed, arg, request):
+    return ':'.join((
+        'feed', feed, _digest(arg), *versions(feed, arg),
+        _digest(page_params(request)),
+    ))
+
+
+def get_fragment(key):
+    fragment = _cache().get(key)
+    _count(MISSES_KEY if fragment is None else HITS_KEY)
+    return fragment
+
+
+def set_fragment(key, fragment):
+    _cache().set(key, fragment, settings.FEED_CACHE_TIMEOUT)
+
+
+def invalidate(feed, arg=''):
+    """Сбрасывает все страницы одной ленты."""
+    _cache().set(_feed_version_key(feed, arg), uuid.uuid4().hex, None)
+
+
+def invalidate_feeds(*feeds):
+    """Сбрасывает index и ленты по парам (slug группы, имя автора)."""
+    invalidate('index')
+    for group_slug, username in filter(None, feeds):
+        invalidate('profile', username)
+        if group_slug:
+            invalidate('group_posts', group_slug)
+
+
+def invalidate_all():
+    """Сбрасывает все ленты разом, например после массовой загрузки."""
+    _cache().set('feed:version', uuid.uuid4().hex, None)
+
+
+def _count(key):
+    cache = _cache()
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def stats():
+    cache = _cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
+
+
+def reset_stats():
+    _cache().delete_many((HITS_KEY, MISSES_KEY))
@@ -0,0 +1,70 @@
+"""Версии лент в базе — валидаторы условных GET.
+
+feed_cache сбрасывает отрендеренные страницы в кеше, а здесь те же
+изменения отмечаются строками FeedState: их меняют сигналы постов,
+комментариев, групп и подписок, включая удаления. Чтение — поиск по
+первичному ключу двух строк (общей и ленты), сколько бы постов ни было.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from posts.models import FeedState
+
+# Общая строка: её меняют массовые загрузки, после которых неизвестно,
+# какие ленты задеты.
+ALL = '*'
+
+
+def key(feed, arg=''):
+    return f'{feed}:{arg}' if arg else feed
+
+
+def create(*keys):
+    """Заводит строки новых лент, чтобы запись меняла их одним UPDATE."""
+    FeedState.objects.bulk_create(
+        (FeedState(feed=feed) for feed in keys), ignore_conflicts=True
+    )
+
+
+def touch(*keys):
+    """Увеличивает версии лент; недостающие строки заводит."""
+    keys = set(keys)
+    if not keys:
+        return
+    changes = {'version': F('version') + 1, 'updated': timezone.now()}
+    rows = FeedState.objects.filter(feed__in=keys)
+    if rows.update(**changes) < len(keys):
+        create(*keys)
+        # Повторный UPDATE, а не версия в INSERT: строку мог завести
+        # параллельный запрос, и его версия не должна совпасть с нашей.
+        rows.update(**changes)
+
+
+def touch_feeds(*feeds):
+    """Отмечает index и ленты по парам (slug группы, имя автора)."""
+    keys = ['index']
+    for group_slug, username in filter(None, feeds):
+        if username:
+            keys.append(key('profile', username))
+        if group_slug:
+            keys.append(key('group_posts', group_slug))
+    touch(*keys)
+
+
+def touch_all():
+    """Отмечает все ленты разом, например после массовой загрузки."""
+    touch(ALL)
+
+
+def state(feed, arg=''):
+    """(версии для ETag, время последнего изменения) ленты."""
+    names = (ALL, key(feed, arg))
+    rows = {
+        name: (version, updated)
+        for name, version, updated in FeedState.objects.filter(
+            feed__in=names
+        ).values_list('feed', 'version', 'updated')
+    }
+    versions = tuple(rows.get(name, (0, None))[0] for name in names)
+    stamps = [updated for _, updated in rows.values()]
+    return versions, max(stamps) if stamps else None
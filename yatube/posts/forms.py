@@ -1,4 +1,6 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
+from posts import images
 from posts.models import Post, Comment
 
 
@@ -8,6 +10,13 @@ class PostForm(ModelForm):
         model = Post
         fields = ('group', 'text', 'image',)
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        images.validate_upload(image)
+        return images.shrink(image)
+
 
 class CommentForm(ModelForm):
 
@@ -0,0 +1,82 @@
+"""Проверка и пережатие загружаемых картинок без лишней памяти.
+
+Файлы крупнее FILE_UPLOAD_MAX_MEMORY_SIZE Django пишет на диск
+частями, и Pillow читает их оттуда. Размеры проверяются по заголовку,
+до декодирования пикселей, а в базу попадает пережатая копия
+не больше POST_IMAGE_MAX_SIDE по длинной стороне.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps, features
+
+
+def configure_pillow():
+    """Pillow отказывается открывать картинки вдвое больше лимита."""
+    Image.MAX_IMAGE_PIXELS = settings.POST_IMAGE_MAX_PIXELS
+
+
+def output_format():
+    if settings.POST_IMAGE_FORMAT == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return settings.POST_IMAGE_FORMAT
+
+
+def validate_upload(upload):
+    """Отсекает слишком тяжёлые файлы и «бомбы» по заголовку картинки."""
+    if upload.size > settings.POST_IMAGE_MAX_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(settings.POST_IMAGE_MAX_SIZE)},
+        )
+    width, height = upload.image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)s×%(height)s слишком большая.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+
+
+def _flatten(image):
+    """Убирает прозрачность для форматов, которые её не поддерживают."""
+    if image.mode in ('RGB', 'L'):
+        return image
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def shrink(upload):
+    """Возвращает пережатую копию загрузки в POST_IMAGE_FORMAT."""
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    image_format = output_format()
+    if hasattr(upload, 'temporary_file_path'):
+        source = upload.temporary_file_path()
+    else:
+        upload.seek(0)
+        source = upload
+    with Image.open(source) as image:
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        if image_format == 'JPEG':
+            image = _flatten(image)
+        buffer = BytesIO()
+        image.save(
+            buffer, image_format,
+            quality=settings.POST_IMAGE_QUALITY, optimize=True
+        )
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    extension = 'jpg' if image_format == 'JPEG' else image_format.lower()
+    return SimpleUploadedFile(
+        f'{stem}.{extension}', buffer.getvalue(),
+        Image.MIME[image_format],
+    )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from posts import media
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики ссылок на картинки постов и удаляет файлы '
+        'без ссылок вместе с их миниатюрами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int,
+            help='сколько секунд файл без ссылок ещё хранится '
+                 '(по умолчанию MEDIA_GC_GRACE)'
+        )
+        parser.add_argument(
+            '--scan', action='store_true',
+            help='найти в хранилище файлы, о которых база не знает'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='только показать, что будет удалено'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Счётчиков исправлено: {media.reconcile()}')
+        if options['scan']:
+            self.stdout.write(
+                f'Новых файлов в хранилище: {media.register_untracked()}'
+            )
+        names = media.collect(options['grace'], options['dry_run'])
+        for name in names:
+            self.stdout.write(name)
+        verb = 'К удалению' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(f'{verb} файлов: {len(names)}'))
@@ -0,0 +1,195 @@
+import csv
+import itertools
+import json
+import sys
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import bulk
+from posts.models import Comment, Group, Post, User
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise CommandError(f'Строка {number}: {error}')
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+class Lookup:
+    """Кеш объектов по ключу, который дозапрашивается пачками."""
+
+    def __init__(self, model, field, create=None):
+        self.model = model
+        self.field = field
+        self.create = create
+        self.cache = {}
+
+    def _fetch(self, keys):
+        found = self.model.objects.filter(**{f'{self.field}__in': keys})
+        self.cache.update(
+            (getattr(obj, self.field), obj.pk) for obj in found.iterator()
+        )
+
+    def resolve(self, keys):
+        missing = set(keys) - self.cache.keys() - {None, ''}
+        if not missing:
+            return
+        self._fetch(missing)
+        missing -= self.cache.keys()
+        if missing and self.create:
+            self.model.objects.bulk_create(
+                [self.create(key) for key in missing], ignore_conflicts=True
+            )
+            self._fetch(missing)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты и комментарии из JSONL или CSV пачками через '
+        'bulk_create. Строка JSONL: {"text", "author", "group", '
+        '"pub_date", "image", "comments": [{"text", "author", '
+        '"pub_date"}]}; в CSV те же колонки, кроме comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл или - для stdin')
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='по умолчанию по расширению файла, для stdin — jsonl'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='создавать неизвестных авторов и группы, а не пропускать'
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or (
+            'csv' if options['path'].endswith('.csv') else 'jsonl'
+        )
+        create = options['create_missing']
+        self.authors = Lookup(User, 'username', create and self.new_user)
+        self.groups = Lookup(Group, 'slug', create and self.new_group)
+        self.now = timezone.now()
+        self.posts = self.comments = self.skipped = 0
+        started = time.monotonic()
+        with self.open(options['path']) as stream, bulk.keep_pub_date():
+            records = READERS[fmt](stream)
+            size = options['batch_size']
+            while True:
+                batch = list(itertools.islice(records, size))
+                if not batch:
+                    break
+                self.load(batch)
+                self.report(started)
+        bulk.after_load()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {self.posts}, комментариев: '
+            f'{self.comments}, пропущено: {self.skipped}'
+        ))
+
+    def open(self, path):
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+        return open(path, encoding='utf-8', newline='')
+
+    @staticmethod
+    def new_user(username):
+        return User(username=username, password=make_password(None))
+
+    @staticmethod
+    def new_group(slug):
+        return Group(title=slug, slug=slug, description='')
+
+    def pub_date(self, value):
+        if not value:
+            return self.now
+        pub_date = parse_datetime(value)
+        if pub_date is None:
+            raise CommandError(f'Неверная дата: {value}')
+        if timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date)
+        return pub_date
+
+    def load(self, batch):
+        all_comments = [
+            comment for record in batch
+            for comment in record.get('comments') or ()
+        ]
+        self.authors.resolve(itertools.chain(
+            (record.get('author') for record in batch),
+            (comment.get('author') for comment in all_comments),
+        ))
+        self.groups.resolve(record.get('group') for record in batch)
+        posts, post_comments = [], []
+        for record in batch:
+            author_id = self.authors.get(record.get('author'))
+            group = record.get('group')
+            group_id = self.groups.get(group) if group else None
+            if not record.get('text') or not author_id or (
+                group and not group_id
+            ):
+                self.skipped += 1
+                continue
+            comments = self.valid_comments(record)
+            posts.append(Post(
+                text=record['text'],
+                author_id=author_id,
+                group_id=group_id,
+                image=record.get('image') or '',
+                pub_date=self.pub_date(record.get('pub_date')),
+                comments_count=len(comments),
+            ))
+            post_comments.append(comments)
+        with transaction.atomic():
+            bulk.assign_pks(posts)
+            Post.objects.bulk_create(posts)
+            new_comments = [
+                Comment(
+                    text=record['text'],
+                    author_id=self.authors.get(record['author']),
+                    post_id=post.pk,
+                    pub_date=self.pub_date(record.get('pub_date')),
+                )
+                for post, records in zip(posts, post_comments)
+                for record in records
+            ]
+            Comment.objects.bulk_create(new_comments)
+        self.posts += len(posts)
+        self.comments += len(new_comments)
+
+    def valid_comments(self, record):
+        comments = []
+        for comment in record.get('comments') or ():
+            author_id = self.authors.get(comment.get('author'))
+            if comment.get('text') and author_id:
+                comments.append(comment)
+            else:
+                self.skipped += 1
+        return comments
+
+    def report(self, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{self.posts} постов, {self.comments} комментариев, '
+            f'{self.posts / elapsed:.0f} постов/с'
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import TimelineEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает материализованные ленты подписок; с --pending '
+        'только досыпает ленты подписчиков авторов, опустившихся до '
+        'TIMELINE_FANOUT_LIMIT (для cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pending', action='store_true',
+            help='досыпать только ленты, ждущие этого после отписок'
+        )
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            self.stdout.write(
+                f'Авторов досыпано: {timeline.refill_pending()}'
+            )
+        else:
+            timeline.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {TimelineEntry.objects.count()}'
+        ))
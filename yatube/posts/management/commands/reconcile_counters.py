@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с фактическими данными.'
+
+    def handle(self, *args, **options):
+        fixed = counters.reconcile()
+        for field, total in fixed.items():
+            self.stdout.write(f'{field}: исправлено {total}')
+        self.stdout.write(self.style.SUCCESS('Счётчики сверены'))
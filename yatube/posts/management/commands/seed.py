@@ -0,0 +1,241 @@
+import datetime
+import itertools
+import posixpath
+import random
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+
+from posts import bulk, images, thumbnails
+from posts.models import Comment, Follow, Group, Post, User
+
+WORDS = (
+    'утро', 'вечер', 'город', 'река', 'книга', 'кот', 'погода', 'дорога',
+    'друг', 'работа', 'отпуск', 'музыка', 'кино', 'море', 'лес', 'снег',
+    'дождь', 'солнце', 'чай', 'кофе', 'поезд', 'письмо', 'сад', 'мост',
+    'новый', 'старый', 'тихий', 'быстрый', 'тёплый', 'долгий', 'странный',
+    'читать', 'гулять', 'думать', 'писать', 'ждать', 'видеть', 'помнить',
+    'сегодня', 'снова', 'почти', 'очень', 'всегда', 'никогда', 'вместе',
+)
+START = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса рангов 1..count по закону Ципфа."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def batches(total, size):
+    for offset in range(0, total, size):
+        yield range(offset, min(offset + size, total))
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками через bulk_create. Авторство постов, '
+        'подписчики авторов и обсуждения распределены по закону Ципфа; '
+        'при одном --seed данные совпадают от запуска к запуску.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='показатель степенного закона распределений'
+        )
+        parser.add_argument(
+            '--images', type=float, default=0,
+            help='доля постов с картинкой-заглушкой, от 0 до 1'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--password',
+            help='пароль всех созданных пользователей; без него войти нельзя'
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='префикс имён пользователей и slug групп'
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options['images'] <= 1:
+            raise CommandError('--images должен быть от 0 до 1')
+        self.options = options
+        self.rnd = random.Random(options['seed'])
+        self.size = options['batch_size']
+        self.started = time.monotonic()
+        users = self.create_users()
+        groups = self.create_groups()
+        # Ранги пользователей общие: популярные авторы и пишут больше.
+        authors = zipf_weights(len(users), options['zipf'])
+        with bulk.keep_pub_date():
+            posts = self.create_posts(users, authors, groups)
+            self.create_comments(users, posts)
+        self.create_follows(users, authors)
+        self.report('Пересчёт счётчиков и лент')
+        bulk.after_load()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано за {time.monotonic() - self.started:.0f} с: '
+            f'пользователей {len(users)}, постов {len(posts)}'
+        ))
+
+    def report(self, message):
+        self.stdout.write(
+            f'[{time.monotonic() - self.started:6.1f} с] {message}'
+        )
+
+    def create_users(self):
+        prefix, total = self.options['prefix'], self.options['users']
+        self.report(f'Пользователи: {total}')
+        # Хеш считается один раз: PBKDF2 на каждого слишком дорог.
+        password = make_password(self.options['password'])
+        for numbers in batches(total, self.size):
+            User.objects.bulk_create(
+                (
+                    User(
+                        username=f'{prefix}{i}', password=password,
+                        first_name=self.rnd.choice(WORDS).capitalize(),
+                        date_joined=START,
+                    )
+                    for i in numbers
+                ),
+                ignore_conflicts=True
+            )
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by('pk').values_list('pk', flat=True)[:total]
+        )
+
+    def create_groups(self):
+        prefix, total = self.options['prefix'], self.options['groups']
+        Group.objects.bulk_create(
+            (
+                Group(
+                    title=f'{self.rnd.choice(WORDS).capitalize()} {i}',
+                    slug=f'{prefix}-{i}', description=self.text(5, 20),
+                )
+                for i in range(total)
+            ),
+            ignore_conflicts=True
+        )
+        return list(
+            Group.objects.filter(slug__startswith=f'{prefix}-')
+            .order_by('pk').values_list('pk', flat=True)[:total]
+        )
+
+    def text(self, shortest, longest):
+        return ' '.join(
+            self.rnd.choices(WORDS, k=self.rnd.randint(shortest, longest))
+        ).capitalize()
+
+    def placeholders(self):
+        count = self.options['images'] and 8
+        names = []
+        image_format = images.output_format()
+        extension = 'jpg' if image_format == 'JPEG' else image_format.lower()
+        storage = Post.image.field.storage
+        for number in range(count):
+            color = tuple(self.rnd.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', (960, 540), color).save(buffer, image_format)
+            name = storage.save(
+                posixpath.join(
+                    Post.image.field.upload_to, f'seed-{number}.{extension}'
+                ),
+                ContentFile(buffer.getvalue())
+            )
+            # Заглушек немного, миниатюры готовятся сразу, до первой ленты.
+            if settings.THUMBNAIL_PREGENERATE:
+                thumbnails.generate(name)
+            names.append(name)
+        return names
+
+    def create_posts(self, users, authors, groups):
+        total = self.options['posts']
+        self.report(f'Посты: {total}')
+        pictures = self.placeholders()
+        share = self.options['images']
+        step = datetime.timedelta(minutes=1)
+        posts = []
+        for numbers in batches(total, self.size):
+            chosen = self.rnd.choices(
+                users, cum_weights=authors, k=len(numbers)
+            )
+            batch = [
+                Post(
+                    text=self.text(5, 60),
+                    author_id=author_id,
+                    group_id=self.rnd.choice(groups)
+                    if groups and self.rnd.random() < 0.7 else None,
+                    image=self.rnd.choice(pictures)
+                    if pictures and self.rnd.random() < share else '',
+                    pub_date=START + step * i,
+                )
+                for i, author_id in zip(numbers, chosen)
+            ]
+            with transaction.atomic():
+                bulk.assign_pks(batch)
+                Post.objects.bulk_create(batch)
+            posts.extend(post.pk for post in batch)
+            self.report(f'{len(posts)} постов')
+        return posts
+
+    def create_comments(self, users, posts):
+        total = self.options['comments']
+        if not posts:
+            return
+        self.report(f'Комментарии: {total}')
+        # Немногие посты собирают большую часть обсуждения.
+        viral = zipf_weights(len(posts), self.options['zipf'])
+        step = datetime.timedelta(minutes=1) * len(posts) / max(total, 1)
+        for numbers in batches(total, self.size):
+            targets = self.rnd.choices(
+                posts, cum_weights=viral, k=len(numbers)
+            )
+            Comment.objects.bulk_create(
+                Comment(
+                    text=self.text(1, 20),
+                    author_id=self.rnd.choice(users),
+                    post_id=post_id,
+                    pub_date=START + step * i,
+                )
+                for i, post_id in zip(numbers, targets)
+            )
+
+    def create_follows(self, users, authors):
+        total = min(self.options['follows'], len(users) * (len(users) - 1))
+        self.report(f'Подписки: {total}')
+        edges = set()
+        while len(edges) < total:
+            need = total - len(edges)
+            edges.update(
+                (user, author) for user, author in zip(
+                    self.rnd.choices(users, k=need),
+                    self.rnd.choices(users, cum_weights=authors, k=need),
+                )
+                if user != author
+            )
+        # Порядок множества зависит от хеша, а вставка должна повторяться.
+        ordered = sorted(edges)
+        for numbers in batches(len(ordered), self.size):
+            Follow.objects.bulk_create(
+                (
+                    Follow(user_id=user, author_id=author)
+                    for user, author in ordered[numbers.start:numbers.stop]
+                ),
+                ignore_conflicts=True
+            )
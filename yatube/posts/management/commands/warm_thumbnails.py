@@ -0,0 +1,73 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.storage import walk
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Параллельно готовит миниатюры для уже загруженных картинок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 2,
+            help='Число потоков; 1 — без пула (по умолчанию по числу ядер).'
+        )
+        parser.add_argument(
+            '--path', default=Post.image.field.upload_to,
+            help='Каталог в хранилище медиафайлов.'
+        )
+
+    def _warm(self, name):
+        try:
+            thumbnails.generate(name)
+        finally:
+            connections.close_all()
+
+    def _warm_inline(self, names):
+        done = failed = 0
+        for name in names:
+            try:
+                thumbnails.generate(name)
+                done += 1
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+        return done, failed
+
+    def _warm_parallel(self, names, workers):
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._warm, name): name for name in names}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{futures[future]}: {error}')
+        return done, failed
+
+    def handle(self, *args, **options):
+        if not default_storage.exists(options['path']):
+            self.stdout.write(f'Каталог {options["path"]} пуст')
+            return
+        started = time.monotonic()
+        names = walk(default_storage, options['path'])
+        if options['workers'] > 1:
+            done, failed = self._warm_parallel(names, options['workers'])
+        else:
+            done, failed = self._warm_inline(names)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {done}, ошибок: {failed}, '
+            f'миниатюр на файл: '
+            f'{len(thumbnails.formats()) * len(thumbnails.geometries())}, '
+            f'{elapsed:.1f} с'
+        ))
@@ -0,0 +1,118 @@
+"""Счётчики ссылок на картинки постов и сборка мусора.
+
+Картинки лежат в ContentAddressedStorage: одинаковые загрузки разных
+постов — один файл. Поэтому пост, потерявший картинку, файл не
+удаляет, а уменьшает MediaFile.refs; файл без ссылок удаляет
+collect(), и только когда счётчик пролежал нулём дольше MEDIA_GC_GRACE.
+Этот запас нужен загрузке, которая как раз переиспользует файл:
+storage.save() уже вернул имя, а пост ещё не сохранён.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Count, F
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_with_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from core.storage import walk
+from posts import thumbnails
+from posts.models import MediaFile, Post
+
+CHUNK_SIZE = 500
+
+
+def _bump(name, delta):
+    files = MediaFile.objects.filter(name=name)
+    if delta < 0:
+        files = files.filter(refs__gt=0)
+    return files.update(refs=F('refs') + delta, updated=timezone.now())
+
+
+def acquire(name):
+    """Пост начал ссылаться на файл name."""
+    if not name or _bump(name, 1):
+        return
+    _, created = MediaFile.objects.get_or_create(
+        name=name, defaults={'refs': 1}
+    )
+    if not created:
+        _bump(name, 1)
+
+
+def release(name):
+    """Пост перестал ссылаться на файл name."""
+    if name:
+        _bump(name, -1)
+
+
+def reconcile():
+    """Сверяет refs с постами; возвращает число исправленных файлов."""
+    actual = dict(
+        Post.objects.exclude(image='').order_by()
+        .values_list('image').annotate(total=Count('pk'))
+    )
+    fixed = 0
+    for name, refs in MediaFile.objects.values_list('name', 'refs'):
+        count = actual.pop(name, 0)
+        if count != refs:
+            fixed += 1
+            MediaFile.objects.filter(name=name).update(
+                refs=count, updated=timezone.now()
+            )
+    MediaFile.objects.bulk_create(
+        MediaFile(name=name, refs=refs) for name, refs in actual.items()
+    )
+    return fixed + len(actual)
+
+
+def register_untracked():
+    """Заводит счётчик для файлов каталога постов, которых нет в базе.
+
+    Это файлы, сохранённые до MediaFile или оставшиеся от поста, чья
+    запись не удалась. Их счётчик начинается с нуля и сейчас, так что
+    collect() удалит их не раньше, чем через MEDIA_GC_GRACE.
+    """
+    storage = Post.image.field.storage
+    directory = Post.image.field.upload_to
+    if not storage.exists(directory):
+        return 0
+    names = list(walk(storage, directory.rstrip('/')))
+    known = set()
+    for offset in range(0, len(names), CHUNK_SIZE):
+        known.update(MediaFile.objects.filter(
+            name__in=names[offset:offset + CHUNK_SIZE]
+        ).values_list('name', flat=True))
+    untracked = [name for name in names if name not in known]
+    MediaFile.objects.bulk_create(
+        (MediaFile(name=name) for name in untracked), ignore_conflicts=True
+    )
+    return len(untracked)
+
+
+def collect(grace=None, dry_run=False):
+    """Удаляет файлы без ссылок вместе с миниатюрами; возвращает имена."""
+    if grace is None:
+        grace = settings.MEDIA_GC_GRACE
+    cutoff = timezone.now() - datetime.timedelta(seconds=grace)
+    orphans = list(MediaFile.objects.filter(
+        refs=0, updated__lt=cutoff
+    ).values_list('name', flat=True))
+    storage = Post.image.field.storage
+    collected = []
+    for offset in range(0, len(orphans), CHUNK_SIZE):
+        chunk = orphans[offset:offset + CHUNK_SIZE]
+        # Счётчик мог разойтись с постами после правок в обход ORM.
+        alive = set(Post.objects.filter(image__in=chunk).values_list(
+            'image', flat=True
+        ))
+        names = [name for name in chunk if name not in alive]
+        collected += names
+        if dry_run:
+            continue
+        for name in names:
+            if name.startswith(Post.image.field.upload_to):
+                delete_with_thumbnails(ImageFile(name, storage))
+                thumbnails.forget(name)
+        MediaFile.objects.filter(name__in=names, refs=0).delete()
+    return collected
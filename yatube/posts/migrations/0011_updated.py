@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:09
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import F
+
+post_fts = import_module('posts.migrations.0010_post_fts')
+
+
+def fill_updated(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated=F('pub_date'))
+
+
+def recreate_fts(apps, schema_editor):
+    # SQLite добавляет поле, пересоздавая таблицу, и теряет триггеры FTS5.
+    post_fts.drop_fts(apps, schema_editor)
+    post_fts.create_fts(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recreate_fts),
+        migrations.AddField(
+            model_name='authorstats',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменена'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменён'),
+        ),
+        migrations.RunPython(fill_updated, migrations.RunPython.noop),
+        migrations.RunPython(recreate_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_updated'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_post_date_idx',
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='moderation',
+            field=models.BooleanField(default=False, verbose_name='На модерации'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(moderation=False), fields=['post', 'pub_date', 'id'], name='comment_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(moderation=True), fields=['pub_date', 'id'], name='comment_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_states(apps, schema_editor):
+    FeedState = apps.get_model('posts', 'FeedState')
+    Group = apps.get_model('posts', 'Group')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    FeedState.objects.bulk_create(
+        FeedState(feed=feed) for feed in ('*', 'index')
+    )
+    for model, feed, field in (
+        (Group, 'group_posts', 'slug'), (User, 'profile', 'username')
+    ):
+        FeedState.objects.bulk_create(
+            (
+                FeedState(feed=f'{feed}:{value}')
+                for value in model.objects.values_list(field, flat=True)
+                .iterator()
+            ),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_mediafile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedState',
+            fields=[
+                ('feed', models.CharField(max_length=200, primary_key=True, serialize=False, verbose_name='Лента')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Версия')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Изменена')),
+            ],
+            options={
+                'verbose_name': 'Состояние ленты',
+                'verbose_name_plural': 'Состояния лент',
+            },
+        ),
+        migrations.RunPython(create_states, migrations.RunPython.noop),
+    ]
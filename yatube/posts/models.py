@@ -1,9 +1,22 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+
+    def feed(self):
+        """Посты для лент: всё, что выводят шаблоны, одним запросом."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'image',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__title', 'group__slug', 'comments_count',
+        ).order_by('-pub_date', '-pk')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Сообщение',
@@ -28,14 +41,39 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Выберите группу'
     )
+    # Одинаковые картинки разных постов хранятся одним файлом.
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+    # Меняется при правке поста и при каждом новом или удалённом
+    # комментарии: по нему страница поста отвечает 304.
+    updated = models.DateTimeField('Изменён', auto_now=True)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        # Обратный проход по индексу отдаёт ленту в порядке
+        # (-pub_date, -id) без сортировки во временном B-дереве.
+        indexes = [
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=('group', 'pub_date', 'id'),
+                name='post_group_date_idx'
+            ),
+            models.Index(fields=('pub_date', 'id'), name='post_date_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -67,6 +105,16 @@ class Group(models.Model):
         return self.title
 
 
+class CommentQuerySet(models.QuerySet):
+
+    def visible(self):
+        """Прошедшие модерацию; фильтр совпадает с частичным индексом."""
+        return self.filter(moderation=False)
+
+    def pending(self):
+        return self.filter(moderation=True)
+
+
 class Comment(models.Model):
     text = models.TextField(
         verbose_name='Текст комментария',
@@ -91,10 +139,27 @@ class Comment(models.Model):
         verbose_name='Пост',
         help_text='Пост'
     )
-    moderation = models.BooleanField('Модерация', default=False)
+    # True — комментарий ждёт модерации и на странице поста не виден.
+    moderation = models.BooleanField('На модерации', default=False)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        # Частичные индексы: в ленту комментариев поста не попадают
+        # ожидающие, а очередь модерации мала и не раздувает индекс.
+        indexes = [
+            models.Index(
+                fields=('post', 'pub_date', 'id'),
+                name='comment_visible_idx',
+                condition=models.Q(moderation=False),
+            ),
+            models.Index(
+                fields=('pub_date', 'id'),
+                name='comment_pending_idx',
+                condition=models.Q(moderation=True),
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -123,8 +188,122 @@ class Follow(models.Model):
                 name='unique_following'
             )
         ]
+        # Индекс (author, user) даёт ограничение unique_following.
+        indexes = [
+            models.Index(
+                fields=('user', 'author'),
+                name='follow_user_author_idx'
+            ),
+        ]
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    # Автор опустился до TIMELINE_FANOUT_LIMIT, и ленты подписчиков ждут
+    # его постов от `manage.py rebuild_timeline --pending`; до тех пор
+    # они читаются напрямую, как посты знаменитости.
+    timeline_refill = models.BooleanField(
+        'Ленты ждут досыпки', default=False
+    )
+    updated = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'Статистика {self.user_id}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date'),
+                name='timeline_user_date_idx'
+            )
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+
+    def __str__(self):
+        return f'{self.post_id} в ленте {self.user_id}'
+
+
+class MediaFile(models.Model):
+    """Счётчик ссылок постов на файл картинки.
+
+    Файл без ссылок удаляет `manage.py gc_media`, когда счётчик
+    пролежит нулём дольше MEDIA_GC_GRACE.
+    """
+    name = models.CharField('Файл', max_length=100, primary_key=True)
+    refs = models.PositiveIntegerField('Ссылок', default=0)
+    updated = models.DateTimeField('Изменён', auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('updated',),
+                name='mediafile_orphan_idx',
+                condition=models.Q(refs=0),
+            ),
+        ]
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+    def __str__(self):
+        return self.name
+
+
+class FeedState(models.Model):
+    """Версия ленты для условных GET (posts.conditional).
+
+    Строку ленты ('index', 'group_posts:<slug>', 'profile:<имя>') и общую
+    строку '*' меняет каждая запись, которая меняет ленту, поэтому
+    валидаторы читаются по первичному ключу, а не агрегатом по постам.
+    """
+    feed = models.CharField('Лента', max_length=200, primary_key=True)
+    version = models.PositiveIntegerField('Версия', default=0)
+    updated = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Состояние ленты'
+        verbose_name_plural = 'Состояния лент'
+
+    def __str__(self):
+        return f'{self.feed} v{self.version}'
@@ -0,0 +1,49 @@
+"""Очередь модерации комментариев.
+
+При COMMENT_MODERATION новые комментарии сохраняются с
+moderation=True и на странице поста не видны. Одобрение — один UPDATE
+на всю выборку, без save() и сигналов, поэтому счётчики постов, кеш
+лент и их версии здесь же приводятся в порядок для затронутых постов.
+"""
+from django.conf import settings
+from django.db import router, transaction
+
+from posts import counters, feed_cache, feed_state
+
+# SQLite до 3.32 принимает не больше 999 параметров в запросе.
+RECOUNT_CHUNK = 500
+
+
+def is_enabled():
+    return settings.COMMENT_MODERATION
+
+
+def approve(queryset):
+    """Одобряет ожидающие комментарии выборки; возвращает их число."""
+    pending = queryset.pending().order_by()
+    with transaction.atomic():
+        post_ids = list(
+            pending.filter(post__isnull=False)
+            .values_list('post_id', flat=True).distinct()
+        )
+        feeds = list(pending.filter(post__isnull=False).values_list(
+            'post__group__slug', 'post__author__username'
+        ).distinct())
+        approved = pending.update(moderation=False)
+        for start in range(0, len(post_ids), RECOUNT_CHUNK):
+            counters.recount_posts(post_ids[start:start + RECOUNT_CHUNK])
+    if approved:
+        feed_cache.invalidate_feeds(*feeds)
+        feed_state.touch_feeds(*feeds)
+    return approved
+
+
+def reject(queryset):
+    """Удаляет ожидающие комментарии выборки; возвращает их число.
+
+    Они не учтены ни в счётчиках, ни в лентах, и на них никто не
+    ссылается, поэтому это один DELETE мимо сборщика Django: тот из-за
+    обработчиков post_delete загрузил бы каждый комментарий в память.
+    """
+    pending = queryset.pending().order_by()
+    return pending._raw_delete(router.db_for_write(pending.model))
@@ -0,0 +1,193 @@
+import base64
+import collections.abc
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(pub_date, pk):
+    """Упаковывает позицию (pub_date, id) в токен для URL."""
+    raw = f'{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора обратно в (pub_date, id)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        pub_date, pk = raw.rsplit('|', 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if pub_date is None:
+        raise InvalidCursor(token)
+    return pub_date, pk
+
+
+class CursorPage(collections.abc.Sequence):
+    """Страница ленты, полученная по курсору, а не по номеру."""
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Пагинация по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Стоимость любой страницы одинакова: запрос опирается на индекс
+    по сортировочным полям и выбирает per_page + 1 строку, чтобы узнать,
+    есть ли продолжение.
+    """
+
+    after_param = 'after'
+    before_param = 'before'
+
+    def __init__(self, object_list, per_page, date_field='pub_date'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.date_field = date_field
+
+    def _position(self, obj):
+        return encode_cursor(getattr(obj, self.date_field), obj.pk)
+
+    def _older_than(self, pub_date, pk):
+        return (
+            Q(**{f'{self.date_field}__lt': pub_date})
+            | Q(**{self.date_field: pub_date, 'pk__lt': pk})
+        )
+
+    def _newer_than(self, pub_date, pk):
+        return (
+            Q(**{f'{self.date_field}__gt': pub_date})
+            | Q(**{self.date_field: pub_date, 'pk__gt': pk})
+        )
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before."""
+        descending = (f'-{self.date_field}', '-pk')
+        ascending = (self.date_field, 'pk')
+        if before:
+            position = decode_cursor(before)
+            rows = list(
+                self.object_list.filter(self._newer_than(*position))
+                .order_by(*ascending)[:self.per_page + 1]
+            )
+            if not rows:
+                return self.page()
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            previous_cursor = self._position(rows[0]) if has_more else None
+            return CursorPage(
+                rows, self, self._position(rows[-1]), previous_cursor
+            )
+        queryset = self.object_list.order_by(*descending)
+        if after:
+            queryset = queryset.filter(
+                self._older_than(*decode_cursor(after))
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        next_cursor = self._position(rows[-1]) if rows and has_more else None
+        previous_cursor = None
+        if after:
+            previous_cursor = self._position(rows[0]) if rows else after
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def get_page(self, after=None, before=None):
+        """Как page(), но битый курсор ведёт на первую страницу."""
+        try:
+            return self.page(after=after, before=before)
+        except InvalidCursor:
+            return self.page()
+
+
+class FeedPaginator(Paginator):
+    """Paginator для лент: окно ссылок и приблизительный COUNT(*).
+
+    Шаблону отдаётся не весь page_range, а окно вокруг текущей
+    страницы с первой и последней страницами по краям; пропуски
+    обозначены None. При PAGINATOR_COUNT_TIMEOUT > 0 число записей
+    берётся из кеша и пересчитывается не чаще раза в указанное
+    число секунд, поэтому новые посты могут появиться в счётчике
+    страниц с задержкой.
+    """
+
+    def _get_page(self, object_list, number, paginator):
+        # Страница остаётся обычной Page: окно считается сразу, число
+        # страниц к этому моменту уже известно из validate_number().
+        page = Page(object_list, number, paginator)
+        page.page_window = self.page_window(number)
+        return page
+
+    def page_window(self, number):
+        on_each_side = settings.PAGINATOR_ON_EACH_SIDE
+        on_ends = settings.PAGINATOR_ON_ENDS
+        last = self.num_pages
+        if last <= (on_each_side + on_ends) * 2 + 1:
+            return list(self.page_range)
+        window = []
+        if number > on_each_side + on_ends + 1:
+            window += list(range(1, on_ends + 1)) + [None]
+            window += range(number - on_each_side, number + 1)
+        else:
+            window += range(1, number + 1)
+        if number < last - on_each_side - on_ends:
+            window += range(number + 1, number + on_each_side + 1)
+            window += [None] + list(range(last - on_ends + 1, last + 1))
+        else:
+            window += range(number + 1, last + 1)
+        return window
+
+    def _count_key(self):
+        sql, params = self.object_list.query.sql_with_params()
+        digest = hashlib.md5(
+            f'{self.object_list.db}|{sql}|{params!r}'.encode()
+        ).hexdigest()
+        return f'paginator:count:{digest}'
+
+    @cached_property
+    def count(self):
+        timeout = settings.PAGINATOR_COUNT_TIMEOUT
+        if not timeout or not hasattr(self.object_list, 'query'):
+            return super().count
+        cache = caches[settings.FEED_CACHE_ALIAS]
+        key = self._count_key()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout)
+        return count
@@ -0,0 +1,229 @@
+"""Полнотекстовый поиск по постам через инвертированный индекс.
+
+На SQLite со сборкой FTS5 индекс — виртуальная таблица posts_post_fts,
+которую триггеры из миграции 0010 держат в актуальном состоянии.
+В остальных случаях работает индекс в памяти процесса: он строится
+при первом поиске и дальше обновляется сигналами Post. Результаты
+ранжируются по BM25 в обоих случаях.
+"""
+import bisect
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections, router
+
+from posts.models import Post
+
+FTS_TABLE = 'posts_post_fts'
+WORD_RE = re.compile(r'\w+')
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+def fts_available(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def backend_name(using='default'):
+    if settings.SEARCH_BACKEND == 'python':
+        return 'python'
+    return 'fts5' if fts_available(using) else 'python'
+
+
+class FtsIndex:
+    """Поиск через SQLite FTS5: MATCH по префиксам слов, порядок bm25()."""
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    @staticmethod
+    def _match(query):
+        return ' '.join(f'"{word}"*' for word in tokenize(query))
+
+    def count(self, query):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self._match(query)]
+            )
+            return cursor.fetchone()[0]
+
+    def ids(self, query, offset, limit):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}), rowid DESC LIMIT %s OFFSET %s',
+                [self._match(query), limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class MemoryIndex:
+    """Инвертированный индекс в памяти: слово -> {id поста: частота}."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)
+        self._terms = {}
+        self._lengths = {}
+        self._vocabulary = None
+        self._last = None
+        self._built = False
+
+    @property
+    def built(self):
+        return self._built
+
+    def _changed(self):
+        self._vocabulary = None
+        self._last = None
+
+    def _add(self, post_id, text):
+        words = Counter(tokenize(text))
+        self._terms[post_id] = tuple(words)
+        self._lengths[post_id] = sum(words.values())
+        for word, frequency in words.items():
+            self._postings[word][post_id] = frequency
+
+    def _remove(self, post_id):
+        self._lengths.pop(post_id, None)
+        for word in self._terms.pop(post_id, ()):
+            del self._postings[word][post_id]
+            if not self._postings[word]:
+                del self._postings[word]
+
+    def build(self):
+        with self._lock:
+            self._postings.clear()
+            self._terms.clear()
+            self._lengths.clear()
+            self._changed()
+            posts = Post.objects.values_list('pk', 'text')
+            for post_id, text in posts.iterator(chunk_size=2000):
+                self._add(post_id, text)
+            self._built = True
+
+    def reset(self):
+        with self._lock:
+            self._postings.clear()
+            self._terms.clear()
+            self._lengths.clear()
+            self._changed()
+            self._built = False
+
+    def update(self, post_id, text):
+        with self._lock:
+            if self._built:
+                self._remove(post_id)
+                self._add(post_id, text)
+                self._changed()
+
+    def delete(self, post_id):
+        with self._lock:
+            if self._built:
+                self._remove(post_id)
+                self._changed()
+
+    def _matches(self, word):
+        """Посты со словами, начинающимися с word, и их частоты."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        found = Counter()
+        position = bisect.bisect_left(self._vocabulary, word)
+        while position < len(self._vocabulary):
+            term = self._vocabulary[position]
+            if not term.startswith(word):
+                break
+            found.update(self._postings[term])
+            position += 1
+        return found
+
+    def _ranked(self, query):
+        with self._lock:
+            if not self._built:
+                self.build()
+            words = tokenize(query)
+            if not words:
+                return []
+            if self._last and self._last[0] == words:
+                return self._last[1]
+            total = len(self._lengths)
+            average = sum(self._lengths.values()) / total if total else 0
+            scores = None
+            for word in words:
+                docs = self._matches(word)
+                idf = math.log(1 + (total - len(docs) + 0.5)
+                               / (len(docs) + 0.5))
+                word_scores = {}
+                for post_id, frequency in docs.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B
+                                      * self._lengths[post_id] / average)
+                    word_scores[post_id] = idf * frequency * (BM25_K1 + 1) / (
+                        frequency + norm
+                    )
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {
+                        post_id: score + word_scores[post_id]
+                        for post_id, score in scores.items()
+                        if post_id in word_scores
+                    }
+            ranked = sorted(scores, key=lambda pk: (-scores[pk], -pk))
+            self._last = (words, ranked)
+            return ranked
+
+    def count(self, query):
+        return len(self._ranked(query))
+
+    def ids(self, query, offset, limit):
+        return self._ranked(query)[offset:offset + limit]
+
+
+memory_index = MemoryIndex()
+
+
+def get_index(using='default'):
+    return FtsIndex(using) if backend_name(using) == 'fts5' else memory_index
+
+
+class SearchResults:
+    """Результаты поиска для Paginator: count() и срезы по рангу.
+
+    Индекс FTS5 и посты читаются из одной базы — той, куда роутер
+    направляет чтение постов, чтобы id из индекса реплики не искались
+    в основной базе и наоборот.
+    """
+
+    def __init__(self, query, index=None):
+        self.query = query
+        self.using = router.db_for_read(Post)
+        self.index = index or get_index(self.using)
+
+    def count(self):
+        if not tokenize(self.query):
+            return 0
+        return self.index.count(self.query)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        offset = item.start or 0
+        ids = self.index.ids(self.query, offset, item.stop - offset)
+        posts = Post.objects.feed().using(self.using).in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,178 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from posts import (
+    counters, feed_cache, feed_state, media, search, timeline
+)
+from posts.models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def create_feed_state(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed_state.create(feed_state.key(*(
+            ('profile', instance.username) if sender is User
+            else ('group_posts', instance.slug)
+        )))
+
+
+# Счётчики подключаются первыми: лента опирается на число подписчиков.
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_author(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.bump_author(instance.author_id, 'posts_count', -1)
+
+
+# Комментарии на модерации не видны: не считаются и не сбрасывают
+# ленты, пока их не одобрит posts.moderation.approve().
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created and instance.post_id and not instance.moderation:
+        counters.bump_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    if instance.post_id and not instance.moderation:
+        counters.bump_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_author(instance.author_id, 'followers_count', 1)
+        counters.bump_author(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.bump_author(instance.author_id, 'followers_count', -1)
+    counters.bump_author(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created and timeline.is_enabled():
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created and timeline.is_enabled():
+        timeline.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_timeline(sender, instance, **kwargs):
+    if timeline.is_enabled():
+        timeline.unfollow(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.memory_index.update(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.memory_index.delete(instance.pk)
+
+
+def _post_feeds(post_id):
+    """(slug группы, имя автора) поста по данным в базе."""
+    return Post.objects.filter(pk=post_id).values_list(
+        'group__slug', 'author__username'
+    ).first()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    previous = instance.pk and Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group__slug', 'author__username', 'image').first()
+    instance._previous_feeds = previous and previous[:2]
+    instance._previous_image = previous[2] if previous else ''
+
+
+@receiver(post_save, sender=Post)
+def count_post_image(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', '')
+    if instance.image.name != previous:
+        media.acquire(instance.image.name)
+        media.release(previous)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post_image(sender, instance, **kwargs):
+    media.release(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    group_slug = instance.group.slug if instance.group_id else None
+    feeds = (
+        getattr(instance, '_previous_feeds', None),
+        (group_slug, instance.author.username),
+    )
+    feed_cache.invalidate_feeds(*feeds)
+    feed_state.touch_feeds(*feeds)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    if instance.post_id and not instance.moderation:
+        feeds = _post_feeds(instance.post_id)
+        feed_cache.invalidate_feeds(feeds)
+        feed_state.touch_feeds(feeds)
+
+
+# Посты выводят заголовок группы: их updated меняется вместе с ней,
+# чтобы условные GET лент и страниц постов не отдавали старое.
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def touch_group_posts(sender, instance, created=False, **kwargs):
+    if not created:
+        Post.objects.filter(group=instance).update(updated=timezone.now())
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate('group_posts', instance.slug)
+    authors = User.objects.filter(posts__group=instance).distinct()
+    feeds = [
+        (None, username)
+        for username in authors.values_list('username', flat=True)
+    ]
+    feed_cache.invalidate_feeds(*feeds)
+    feed_state.touch_feeds((instance.slug, None), *feeds)
+
+
+# Профиль выводит счётчики подписок и кнопку подписки.
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_follow_profiles(sender, instance, created=True, **kwargs):
+    if created:
+        usernames = User.objects.filter(
+            pk__in=(instance.user_id, instance.author_id)
+        ).values_list('username', flat=True)
+        feed_state.touch(*(
+            feed_state.key('profile', username) for username in usernames
+        ))
@@ -0,0 +1,45 @@
+from django import template
+
+from posts import feed_cache
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, feed, arg):
+        self.nodelist = nodelist
+        self.feed = feed
+        self.arg = arg
+
+    def render(self, context):
+        request = context.get('request')
+        if request is None or request.user.is_authenticated:
+            return self.nodelist.render(context)
+        key = feed_cache.fragment_key(
+            self.feed.resolve(context),
+            str(self.arg.resolve(context)) if self.arg else '',
+            request,
+        )
+        fragment = feed_cache.get_fragment(key)
+        if fragment is None:
+            fragment = self.nodelist.render(context)
+            feed_cache.set_fragment(key, fragment)
+        return fragment
+
+
+@register.tag
+def feedcache(parser, token):
+    """Кеширует страницу ленты для анонимных читателей.
+
+    {% feedcache 'group_posts' group.slug %} ... {% endfeedcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) not in (2, 3):
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} ожидает имя ленты и необязательный аргумент'
+        )
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    feed = parser.compile_filter(bits[1])
+    arg = parser.compile_filter(bits[2]) if len(bits) == 3 else None
+    return FeedCacheNode(nodelist, feed, arg)
@@ -0,0 +1,139 @@
+import asyncio
+
+from django.core.wsgi import get_wsgi_application
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from core.asgi import ASGIHandler, build_environ
+from posts.models import Follow, Post, User
+
+
+class ASGIHandlerTests(TransactionTestCase):
+    # Запросы выполняются в потоках пула со своими соединениями
+    # с базой, поэтому данные должны быть зафиксированы.
+
+    def setUp(self):
+        self.application = ASGIHandler(get_wsgi_application(), 2)
+        self.addCleanup(self.application.executor.shutdown)
+        self.author = User.objects.create_user(username='author')
+        self.user = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.user, author=self.author)
+        self.post = Post.objects.create(
+            text='Пост для подписчиков', author=self.author
+        )
+
+    def request(self, path, method='GET', query=b'', headers=(), body=b''):
+        messages = [{'type': 'http.request', 'body': body}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': query,
+            'headers': [(b'host', b'localhost'), *headers],
+        }
+        asyncio.run(self.application(scope, receive, send))
+        start, *chunks = sent
+        self.assertFalse(chunks[-1].get('more_body', False))
+        return start['status'], dict(start['headers']), b''.join(
+            chunk['body'] for chunk in chunks
+        )
+
+    def test_feed_pages(self):
+        """Ленты и страница поста отдаются через ASGI."""
+        for path in (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ):
+            with self.subTest(path=path):
+                status, headers, body = self.request(path)
+                self.assertEqual(status, 200)
+                self.assertIn(b'text/html', headers[b'content-type'])
+                self.assertIn('Пост для подписчиков'.encode(), body)
+
+    def test_query_string_and_cookies(self):
+        """Строка запроса и cookie сессии доходят до вьюхи."""
+        status, _, body = self.request(
+            reverse('posts:search'), query='q=подписчиков'.encode()
+        )
+        self.assertIn('Найдено записей: 1'.encode(), body)
+        client = Client()
+        client.force_login(self.user)
+        cookie = f'sessionid={client.cookies["sessionid"].value}'
+        status, _, body = self.request(
+            reverse('posts:follow_index'),
+            headers=[(b'cookie', cookie.encode())]
+        )
+        self.assertEqual(status, 200)
+        self.assertIn('Пост для подписчиков'.encode(), body)
+
+    def test_streaming_response_is_sent_in_chunks(self):
+        """Потоковый ответ уходит по частям с more_body."""
+        def streaming_app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return iter([b'first', b'', b'second', b'third'])
+
+        application = ASGIHandler(streaming_app, 1)
+        self.addCleanup(application.executor.shutdown)
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': []}
+        asyncio.run(application(scope, receive, send))
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(
+            [(body['body'], body.get('more_body')) for body in sent[1:]],
+            [(b'first', True), (b'second', True), (b'third', None)],
+        )
+
+    def test_repeated_cookie_headers(self):
+        """Несколько заголовков Cookie склеиваются через '; '."""
+        environ = build_environ({
+            'method': 'GET', 'path': '/',
+            'headers': [
+                (b'cookie', b'a=1'), (b'cookie', b'b=2'),
+                (b'accept', b'text/html'), (b'accept', b'*/*'),
+            ],
+        }, None)
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+
+    def test_post_body_reaches_csrf_check(self):
+        """Тело POST читается, проверка CSRF работает как в WSGI."""
+        status, _, _ = self.request(
+            reverse('posts:search'), method='POST',
+            headers=[(b'content-type', b'application/x-www-form-urlencoded')],
+            body=b'q=test',
+        )
+        self.assertEqual(status, 403)
+
+    def test_lifespan(self):
+        """Сервер получает подтверждение запуска и остановки."""
+        messages = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.application({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        ])
@@ -0,0 +1,196 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import feed_state
+from posts.models import Comment, FeedState, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.user, group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.user.username]),
+            reverse('posts:post_detail', args=[cls.post.pk]),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def revalidate(self, client, url, response, header='ETag'):
+        request_header = {
+            'ETag': 'HTTP_IF_NONE_MATCH',
+            'Last-Modified': 'HTTP_IF_MODIFIED_SINCE',
+        }[header]
+        return client.get(url, **{request_header: response[header]})
+
+    def test_unchanged_pages_answer_304(self):
+        """Без изменений страница отвечает 304 по ETag и по дате."""
+        for url in self.urls:
+            headers = ['ETag']
+            # У лент нет даты изменения: удаление поста её не сдвигает.
+            if url in self.urls[2:]:
+                headers.append('Last-Modified')
+            for header in headers:
+                with self.subTest(url=url, header=header):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    response = self.revalidate(
+                        self.client, url, response, header
+                    )
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response.content, b'')
+
+    def test_feed_validators_do_not_scan_posts(self):
+        """Валидаторы лент читают строки FeedState по ключу, не посты."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user, group=self.group)
+            for i in range(50)
+        )
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.revalidate(self.client, url, response)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(len(queries), 1)
+                sql = queries[0]['sql']
+                self.assertNotIn('posts_post', sql)
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                    plan = ' '.join(str(row[-1]) for row in cursor)
+                self.assertNotIn('SCAN', plan)
+
+    def test_touch_creates_missing_states(self):
+        """touch() заводит недостающие строки и меняет версии."""
+        feed_state.touch('index', 'profile:новый')
+        versions = dict(FeedState.objects.filter(
+            feed__in=('index', 'profile:новый')
+        ).values_list('feed', 'version'))
+        feed_state.touch('index', 'profile:новый')
+        for feed, version in versions.items():
+            with self.subTest(feed=feed):
+                self.assertGreater(version, 0)
+                self.assertEqual(
+                    FeedState.objects.get(feed=feed).version, version + 1
+                )
+
+    def test_304_skips_rendering(self):
+        """Ответ 304 не рендерит шаблон."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        response = self.revalidate(self.client, url, response)
+        self.assertEqual(response.templates, [])
+
+    def test_edit_changes_validators(self):
+        """Правка поста меняет ETag всех его страниц."""
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_validators_do_not_depend_on_cache(self):
+        """Валидаторы берутся из базы: сброс кеша не меняет ETag."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                cache.clear()
+                response = self.revalidate(self.client, url, response)
+                self.assertEqual(response.status_code, 304)
+
+    def test_delete_changes_feed_validators(self):
+        """Удаление поста меняет ETag лент."""
+        extra = Post.objects.create(
+            text='Лишний пост', author=self.user, group=self.group
+        )
+        etags = [self.client.get(url)['ETag'] for url in self.urls[:3]]
+        extra.delete()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_group_edit_changes_validators(self):
+        """Новый заголовок группы меняет ETag лент и поста."""
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_only_for_guests(self):
+        """Last-Modified не зависит от читателя и отдаётся только гостям."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertFalse(
+                    self.reader_client.get(url).has_header('Last-Modified')
+                )
+        self.assertFalse(
+            self.client.get(self.urls[0]).has_header('Last-Modified')
+        )
+
+    def test_comment_changes_post_validators(self):
+        """Новый комментарий меняет ETag страницы поста."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.client.get(url)
+        Comment.objects.create(
+            text='Комментарий', author=self.reader, post=self.post
+        )
+        response = self.revalidate(self.client, url, response)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Комментарий')
+
+    def test_follow_changes_profile_validators(self):
+        """Подписка меняет ETag профиля автора."""
+        url = reverse('posts:profile', args=[self.user.username])
+        response = self.reader_client.get(url)
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.revalidate(self.reader_client, url, response)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_reader(self):
+        """Гость и авторизованный читатель получают разные ETag."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.client.get(url)['ETag'],
+                    self.reader_client.get(url)['ETag'],
+                )
+
+    def test_etag_depends_on_page(self):
+        """У страниц ленты разные ETag."""
+        url = reverse('posts:index')
+        self.assertNotEqual(
+            self.client.get(url)['ETag'],
+            self.client.get(url, {'page': 2})['ETag'],
+        )
+
+    def test_missing_post_is_not_conditional(self):
+        """Несуществующий пост отдаёт 404 без валидаторов."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk + 100])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import AuthorStats, Comment, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_post_and_comment_counters(self):
+        """Создание поста и комментария через views меняет счётчики."""
+        self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.post.id]),
+            {'text': 'Комментарий'}
+        )
+        self.assertEqual(self.stats(self.user).posts_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_follow_counters(self):
+        """Подписка и отписка меняют счётчики обоих пользователей."""
+        follow_url = reverse('posts:profile_follow', args=['author'])
+        self.authorized_client.get(follow_url)
+        self.authorized_client.get(follow_url)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.user).following_count, 1)
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=['author'])
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.user).following_count, 0)
+
+    def test_first_post_costs_one_update(self):
+        """Статистика заводится с пользователем: первый пост — один UPDATE."""
+        self.assertEqual(self.stats(self.user).posts_count, 0)
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(text='Первый пост', author=self.user)
+        stats_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'posts_authorstats' in query['sql']
+        ]
+        self.assertEqual(len(stats_queries), 1)
+        self.assertTrue(stats_queries[0].startswith('UPDATE'))
+
+    def test_post_detail_renders_without_aggregates(self):
+        """Страница поста выводит статистику без COUNT(*)."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('posts:post_detail', args=[self.post.id])
+            )
+        self.assertContains(response, 'Всего постов автора')
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_reconcile_counters_fixes_drift(self):
+        """reconcile_counters исправляет расхождения со счётом по факту."""
+        Comment.objects.bulk_create([
+            Comment(text='Комментарий', author=self.user, post=self.post)
+        ])
+        AuthorStats.objects.filter(user=self.author).update(posts_count=7)
+        AuthorStats.objects.filter(user=self.user).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.user).posts_count, 0)
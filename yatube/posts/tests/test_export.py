@@ -0,0 +1,137 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ExportFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.user, group=cls.group
+        )
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.make_aware(datetime.datetime(2020, 1, 1))
+        )
+        cls.new_post = Post.objects.create(text='Новый пост', author=cls.user)
+        Comment.objects.create(
+            text='Комментарий', author=cls.reader, post=cls.new_post
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def export(self, *args):
+        call_command('export_feed', self.tmp_dir, *args, stdout=StringIO())
+
+    def latest(self, prefix):
+        """Последняя инкрементальная выгрузка: диапазон в имени файла."""
+        return max(
+            name for name in os.listdir(self.tmp_dir)
+            if name.startswith(prefix + '.') and '--' in name
+        )
+
+    def read(self, name):
+        path = os.path.join(self.tmp_dir, name)
+        with gzip.open(path, 'rt', encoding='utf-8') as source:
+            if name.endswith('.csv.gz'):
+                return list(csv.DictReader(source))
+            return [json.loads(line) for line in source]
+
+    def test_jsonl(self):
+        """Выгружаются посты, комментарии и подписки в gzip JSONL."""
+        self.export('--chunk-size', '1')
+        posts = self.read('posts.jsonl.gz')
+        self.assertEqual([post['text'] for post in posts], [
+            'Старый пост', 'Новый пост'
+        ])
+        self.assertEqual(posts[0]['group'], 'test-slug')
+        self.assertEqual(posts[0]['author'], 'auth')
+        self.assertEqual(posts[1]['comments_count'], 1)
+        self.assertEqual(self.read('comments.jsonl.gz'), [{
+            'id': Comment.objects.get().pk,
+            'post': self.new_post.pk,
+            'text': 'Комментарий',
+            'pub_date': Comment.objects.get().pub_date.isoformat(),
+            'author': 'reader',
+        }])
+        self.assertEqual(
+            self.read('follows.jsonl.gz'),
+            [{'user': 'reader', 'author': 'auth'}]
+        )
+
+    def test_csv(self):
+        """CSV выгружается с заголовком."""
+        self.export('--format', 'csv')
+        posts = self.read('posts.csv.gz')
+        self.assertEqual(posts[1]['text'], 'Новый пост')
+        self.assertEqual(posts[1]['group'], '')
+
+    def test_incremental_export_by_watermark(self):
+        """Повторная выгрузка с меткой содержит только новые записи."""
+        watermark = os.path.join(self.tmp_dir, 'watermark')
+        self.export('--since', '2021-01-01', '--watermark', watermark)
+        first = self.latest('posts')
+        self.assertTrue(first.startswith('posts.20210101T'))
+        self.assertEqual(len(self.read(first)), 2)
+        self.export('--watermark', watermark)
+        self.assertEqual(self.read(self.latest('posts')), [])
+        fresh = Post.objects.create(text='Свежий пост', author=self.user)
+        self.export('--watermark', watermark)
+        self.assertEqual(
+            [post['id'] for post in self.read(self.latest('posts'))],
+            [fresh.pk]
+        )
+        self.assertEqual(len(self.read(self.latest('follows'))), 1)
+        self.assertEqual(len(self.read(first)), 2)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.tmp_dir, 'posts.jsonl.gz'))
+        )
+
+    def test_incremental_export_includes_edited_posts(self):
+        """Правка старого поста попадает в следующую выгрузку."""
+        watermark = os.path.join(self.tmp_dir, 'watermark')
+        self.export('--watermark', watermark)
+        post = Post.objects.get(pk=self.old_post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.export('--watermark', watermark)
+        self.assertEqual(self.read(self.latest('posts')), [
+            dict(self.read('posts.jsonl.gz')[0], text='Исправленный пост')
+        ])
+
+    def test_incremental_export_does_not_overwrite(self):
+        """Выгрузка с тем же диапазоном не затирает уже записанную."""
+        path = os.path.join(
+            self.tmp_dir,
+            'posts.20210101T000000.000000Z--20210102T000000.000000Z.jsonl.gz'
+        )
+        open(path, 'w').close()
+        with mock.patch('django.utils.timezone.now', return_value=(
+            timezone.make_aware(datetime.datetime(2021, 1, 2))
+        )):
+            with self.assertRaisesMessage(CommandError, path):
+                self.export('--since', '2021-01-01')
+        self.assertEqual(os.path.getsize(path), 0)
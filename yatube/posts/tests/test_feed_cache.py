@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import feed_cache
+from posts.models import Comment, Group, Post, User
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_feed_is_served_from_cache(self):
+        """Повторный запрос гостя отдаёт ленту из кеша."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        # Валидаторы условного GET и число страниц.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, 'Тестовый пост')
+        self.assertEqual(feed_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_pages_are_cached_separately(self):
+        """Каждая страница ленты кешируется под своим ключом."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.get(url, {'page': 2})
+        self.assertEqual(feed_cache.stats()['hits'], 0)
+
+    def test_authorized_feed_is_not_cached(self):
+        """Авторизованным пользователям кеш не отдаётся."""
+        self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(feed_cache.stats(), {'hits': 0, 'misses': 0})
+
+    def test_new_post_invalidates_affected_feeds(self):
+        """Новый пост сбрасывает index, группу и профиль автора."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+        )
+        for url in urls:
+            self.client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.user, group=self.group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий пост')
+
+    def test_unrelated_feeds_stay_cached(self):
+        """Пост одного автора не сбрасывает профиль другого."""
+        url = reverse('posts:profile', args=[self.other.username])
+        self.client.get(url)
+        Post.objects.create(text='Свежий пост', author=self.user)
+        self.client.get(url)
+        self.assertEqual(feed_cache.stats()['hits'], 1)
+
+    def test_comment_and_group_changes_invalidate(self):
+        """Комментарий и правка группы сбрасывают затронутые ленты."""
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.client.get(url)
+        Comment.objects.create(text='Ого', author=self.other, post=self.post)
+        self.assertContains(self.client.get(url), 'Комментариев: 1')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(self.client.get(url), 'Новое название')
+        self.assertEqual(feed_cache.stats()['hits'], 0)
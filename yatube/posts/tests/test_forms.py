@@ -1,5 +1,11 @@
-from django.test import Client, TestCase
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from posts.models import Post, Group, User, Comment
 from posts.forms import PostForm
@@ -109,3 +115,68 @@ class CommentFormTest(TestCase):
                 post=CommentFormTest.post.id,
             ).exists()
         )
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_PREGENERATE=False)
+class PostImageFormTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='HasNoName')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @staticmethod
+    def make_image(size, mode='RGBA', image_format='PNG'):
+        buffer = BytesIO()
+        Image.new(mode, size, color='red').save(buffer, image_format)
+        return SimpleUploadedFile(
+            f'image.{image_format.lower()}', buffer.getvalue()
+        )
+
+    def create_post(self, image):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': image}
+        )
+
+    @override_settings(POST_IMAGE_MAX_SIDE=50, POST_IMAGE_FORMAT='JPEG')
+    def test_image_is_reencoded_and_capped(self):
+        """Картинка пережимается в JPEG не больше POST_IMAGE_MAX_SIDE."""
+        self.create_post(self.make_image((200, 100)))
+        post = Post.objects.get(author=self.user)
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with post.image.open(), Image.open(post.image) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (50, 25))
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_is_rejected(self):
+        """Картинка с числом пикселей больше лимита не принимается."""
+        response = self.create_post(self.make_image((20, 20)))
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка 20×20 слишком большая.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_SIZE=10)
+    def test_too_large_file_is_rejected(self):
+        """Файл тяжелее POST_IMAGE_MAX_SIZE не принимается."""
+        response = self.create_post(self.make_image((20, 20)))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('image', response.context['form'].errors)
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_upload_streamed_to_disk(self):
+        """Загрузка из временного файла на диске тоже пережимается."""
+        self.create_post(
+            self.make_image((64, 64), mode='RGB', image_format='JPEG')
+        )
+        self.assertTrue(Post.objects.filter(author=self.user).exists())
@@ -0,0 +1,94 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import AuthorStats, Comment, Group, Post, User
+from posts.search import SearchResults
+
+
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        return path
+
+    def import_posts(self, path, *args):
+        out = StringIO()
+        call_command('import_posts', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_jsonl_with_comments(self):
+        """JSONL грузится пачками вместе с комментариями и датами."""
+        records = [
+            {
+                'text': f'Импортированный пост {i}',
+                'author': 'auth',
+                'group': 'test-slug',
+                'pub_date': f'2020-01-0{i + 1}T10:00:00',
+                'comments': [
+                    {'text': 'Комментарий', 'author': 'auth'}
+                ] * i,
+            }
+            for i in range(5)
+        ]
+        path = self.write('posts.jsonl', '\n'.join(map(json.dumps, records)))
+        output = self.import_posts(path, '--batch-size', '2')
+        self.assertIn('Загружено постов: 5, комментариев: 10', output)
+        post = Post.objects.get(text='Импортированный пост 3')
+        self.assertEqual(post.pub_date, timezone.make_aware(
+            datetime.datetime(2020, 1, 4, 10)
+        ))
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.comments_count, 3)
+        self.assertEqual(post.comments.count(), 3)
+        self.assertEqual(Comment.objects.count(), 10)
+        stats = AuthorStats.objects.get(user=self.user)
+        self.assertEqual(stats.posts_count, 5)
+        self.assertEqual(SearchResults('импортированный').count(), 5)
+
+    def test_csv(self):
+        """CSV грузит посты; строки с неизвестным автором пропускаются."""
+        path = self.write('posts.csv', (
+            'text,author,group,pub_date\n'
+            'Пост из CSV,auth,,\n'
+            'Пост незнакомца,stranger,,\n'
+        ))
+        output = self.import_posts(path)
+        self.assertIn('пропущено: 1', output)
+        self.assertTrue(Post.objects.filter(
+            text='Пост из CSV', author=self.user, group=None
+        ).exists())
+        self.assertFalse(User.objects.filter(username='stranger').exists())
+
+    def test_create_missing(self):
+        """С --create-missing создаются новые авторы и группы."""
+        path = self.write('posts.jsonl', json.dumps({
+            'text': 'Пост', 'author': 'newbie', 'group': 'new-group'
+        }))
+        self.import_posts(path, '--create-missing')
+        post = Post.objects.get(text='Пост')
+        self.assertEqual(post.author.username, 'newbie')
+        self.assertEqual(post.group.slug, 'new-group')
+        self.assertEqual(post.author.stats.posts_count, 1)
@@ -0,0 +1,94 @@
+import datetime
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts import media
+from posts.models import MediaFile, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def upload(content=b'GIF89a', name='small.gif'):
+    return SimpleUploadedFile(name, content, 'image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_PREGENERATE=False)
+class MediaRefsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, image):
+        return Post.objects.create(text='Пост', author=self.user, image=image)
+
+    def refs(self, name):
+        return MediaFile.objects.get(name=name).refs
+
+    def age(self, seconds):
+        MediaFile.objects.update(
+            updated=timezone.now() - datetime.timedelta(seconds=seconds)
+        )
+
+    def test_same_image_is_shared(self):
+        """Одна и та же картинка двух постов — один файл с двумя ссылками."""
+        first = self.create_post(upload(name='a.gif'))
+        second = self.create_post(upload(name='b.gif'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(self.refs(first.image.name), 2)
+        first.delete()
+        self.assertEqual(self.refs(second.image.name), 1)
+        second.image = upload(b'GIF89a other')
+        second.save()
+        self.assertEqual(self.refs(first.image.name), 0)
+        self.assertEqual(self.refs(second.image.name), 1)
+
+    def test_collect_respects_grace_and_references(self):
+        """Сборщик удаляет только давно осиротевшие файлы."""
+        kept = self.create_post(upload()).image.name
+        orphan = self.create_post(upload(b'GIF89a orphan'))
+        name = orphan.image.name
+        orphan.delete()
+        self.assertEqual(media.collect(), [])
+        self.age(2 * 24 * 60 * 60)
+        self.assertEqual(media.collect(dry_run=True), [name])
+        self.assertTrue(Post.image.field.storage.exists(name))
+        self.assertEqual(media.collect(), [name])
+        self.assertFalse(Post.image.field.storage.exists(name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+        self.assertTrue(Post.image.field.storage.exists(kept))
+
+    def test_reconcile_after_bulk_create(self):
+        """reconcile() заводит счётчики для постов из bulk_create."""
+        name = Post.image.field.storage.save('posts/a.gif', upload())
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.user, image=name) for _ in range(3)
+        )
+        self.assertEqual(media.reconcile(), 1)
+        self.assertEqual(self.refs(name), 3)
+        self.assertEqual(media.reconcile(), 0)
+
+    def test_gc_media_command_scans_untracked_files(self):
+        """gc_media --scan находит и удаляет файлы, неизвестные базе."""
+        name = Post.image.field.storage.save(
+            'posts/lost.gif', ContentFile(b'GIF89a lost')
+        )
+        call_command('gc_media', '--scan', stdout=StringIO())
+        self.assertEqual(self.refs(name), 0)
+        self.age(60)
+        output = StringIO()
+        call_command('gc_media', '--grace', '30', stdout=output)
+        self.assertIn(name, output.getvalue())
+        self.assertFalse(Post.image.field.storage.exists(name))
@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.user = User.objects.create_user(username='reader')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        Comment.objects.create(
+            text='Комментарий', author=cls.user, post=cls.post
+        )
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_server_timing_header(self):
+        """Ответ несёт время SQL, шаблонов и число запросов."""
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for part in ('sql;dur=', 'queries"', 'tpl;dur=', 'total;dur='):
+            with self.subTest(part=part):
+                self.assertIn(part, timing)
+
+    def test_metrics_are_grouped_by_view(self):
+        """Гистограммы копятся отдельно для каждой вьюхи."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:post_detail', args=[self.post.pk]))
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['posts:index']['total_ms']['count'], 2)
+        self.assertEqual(snapshot['posts:post_detail']['queries']['max'], 3)
+        self.assertGreater(snapshot['posts:index']['template_ms']['max'], 0)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        """Снимок метрик доступен только staff-пользователям."""
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.authorized_client.get(url).status_code, 302)
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        self.client.get(reverse('posts:index'))
+        response = staff_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index', response.json())
+
+    @override_settings(
+        QUERY_BUDGETS={'posts:index': 0}, QUERY_BUDGET_STRICT=False
+    )
+    def test_budget_overrun_is_logged(self):
+        """Превышение бюджета запросов пишется в лог."""
+        with self.assertLogs('core.middleware', 'WARNING'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(
+        QUERY_BUDGETS={'posts:index': 0}, QUERY_BUDGET_STRICT=True
+    )
+    def test_strict_budget_fails_request(self):
+        """В строгом режиме превышение бюджета роняет запрос."""
+        with self.assertRaises(metrics.QueryBudgetExceeded):
+            self.client.get(reverse('posts:index'))
+
+    def test_pages_fit_query_budgets(self):
+        """Страницы укладываются в бюджеты из настроек."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=пост',
+            reverse('posts:post_create'),
+        )
+        for client in (self.client, self.authorized_client):
+            for url in urls:
+                with self.subTest(url=url):
+                    client.get(url)
+
+
+class HistogramTests(TestCase):
+    def test_quantiles(self):
+        """Квантили берутся по верхним границам корзин."""
+        histogram = metrics.Histogram((1, 5, 10))
+        for value in (0.5, 2, 3, 4, 7, 50):
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 5)
+        self.assertEqual(histogram.quantile(0.8), 10)
+        self.assertEqual(histogram.quantile(0.99), 50)
+        self.assertEqual(histogram.as_dict()['buckets'], {
+            '1': 1, '5': 3, '10': 1, 'inf': 1,
+        })
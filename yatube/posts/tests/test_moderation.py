@@ -0,0 +1,142 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import moderation
+from posts.models import Comment, Post, User
+
+
+@override_settings(COMMENT_MODERATION=True)
+class CommentModerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.staff = User.objects.create_user(
+            username='staff', is_staff=True, is_superuser=True
+        )
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        cls.other_post = Post.objects.create(
+            text='Другой пост', author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def comment(self, client, text):
+        client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': text}
+        )
+
+    def pending(self, count):
+        Comment.objects.bulk_create(
+            Comment(
+                text=f'Ожидает {i}', author=self.user, moderation=True,
+                post=(self.post, self.other_post)[i % 2],
+            )
+            for i in range(count)
+        )
+
+    def test_new_comment_waits_for_moderation(self):
+        """Новый комментарий скрыт и не учтён до одобрения."""
+        self.comment(self.authorized_client, 'Спорный комментарий')
+        comment = Comment.objects.get(text='Спорный комментарий')
+        self.assertTrue(comment.moderation)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertNotContains(response, 'Спорный комментарий')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_staff_comment_is_published(self):
+        """Комментарий staff публикуется без очереди."""
+        self.comment(self.staff_client, 'Слово модератора')
+        self.assertFalse(
+            Comment.objects.get(text='Слово модератора').moderation
+        )
+
+    @override_settings(COMMENT_MODERATION=False)
+    def test_moderation_disabled(self):
+        """Без COMMENT_MODERATION комментарии публикуются сразу."""
+        self.comment(self.authorized_client, 'Сразу виден')
+        self.assertFalse(Comment.objects.get(text='Сразу виден').moderation)
+
+    def test_approve_in_constant_queries(self):
+        """Одобрение выборки — постоянное число запросов."""
+        self.pending(60)
+        with self.assertNumQueries(8):
+            approved = moderation.approve(Comment.objects.all())
+        self.assertEqual(approved, 60)
+        self.assertFalse(Comment.objects.pending().exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 30)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, 'Ожидает 58')
+
+    def test_approve_invalidates_feed_cache(self):
+        """Одобрение сбрасывает закешированную ленту поста."""
+        self.pending(2)
+        url = reverse('posts:index')
+        self.client.get(url)
+        moderation.approve(Comment.objects.all())
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'][0].comments_count, 1)
+
+    def test_reject_deletes_only_pending(self):
+        """Отклонение удаляет только ожидающие комментарии."""
+        self.pending(4)
+        visible = Comment.objects.create(
+            text='Одобренный', author=self.user, post=self.post
+        )
+        self.assertEqual(moderation.reject(Comment.objects.all()), 4)
+        self.assertEqual(list(Comment.objects.all()), [visible])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_reject_in_one_query(self):
+        """Отклонение выборки — один DELETE без загрузки комментариев."""
+        self.pending(60)
+        with self.assertNumQueries(1):
+            rejected = moderation.reject(
+                Comment.objects.filter(post__author=self.user)
+            )
+        self.assertEqual(rejected, 60)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_admin_actions(self):
+        """Действия админки одобряют и отклоняют выбранное."""
+        self.pending(4)
+        first, second, *rest = Comment.objects.order_by('pk')
+        url = reverse('admin:posts_comment_changelist')
+        self.staff_client.post(url, {
+            'action': 'approve', '_selected_action': [first.pk, second.pk],
+        })
+        self.staff_client.post(url, {
+            'action': 'reject', '_selected_action': [obj.pk for obj in rest],
+        })
+        self.assertEqual(
+            list(Comment.objects.order_by('pk')), [first, second]
+        )
+        self.assertFalse(Comment.objects.pending().exists())
+
+    def test_visible_comments_use_partial_index(self):
+        """Видимые комментарии поста читаются по частичному индексу."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('план запроса SQLite')
+        queryset = Comment.objects.visible().filter(
+            post=self.post
+        ).order_by('-pub_date', '-pk')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('comment_visible_idx', plan)
@@ -0,0 +1,111 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import ratelimit
+from posts.models import Follow, Post, User
+
+
+@override_settings(RATE_LIMITS={'posts:add_comment': '2/m'})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        cls.url = reverse('posts:add_comment', args=[cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def comment(self, client=None, ip='10.0.0.1'):
+        return (client or self.authorized_client).post(
+            self.url, {'text': 'Комментарий'}, REMOTE_ADDR=ip
+        )
+
+    def test_limit_answers_429_with_retry_after(self):
+        """Сверх лимита запись получает 429 и Retry-After."""
+        for _ in range(2):
+            self.assertEqual(self.comment().status_code, 302)
+        response = self.comment()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_bucket_refills(self):
+        """Бакет пополняется со временем."""
+        now = time.time()
+        with mock.patch.object(ratelimit.time, 'time', return_value=now):
+            self.comment()
+            self.comment()
+            self.assertEqual(self.comment().status_code, 429)
+        with mock.patch.object(
+            ratelimit.time, 'time', return_value=now + 30
+        ):
+            self.assertEqual(self.comment().status_code, 302)
+
+    def test_user_limit_follows_user_across_ips(self):
+        """Лимит пользователя действует с любого IP."""
+        self.comment(ip='10.0.0.1')
+        self.comment(ip='10.0.0.2')
+        self.assertEqual(self.comment(ip='10.0.0.3').status_code, 429)
+
+    def test_ip_limit_covers_all_users(self):
+        """Лимит IP общий для всех пользователей с этого адреса."""
+        self.comment()
+        self.comment()
+        other_client = Client()
+        other_client.force_login(self.other)
+        self.assertEqual(self.comment(other_client).status_code, 429)
+        self.assertEqual(
+            self.comment(other_client, ip='10.0.0.2').status_code, 302
+        )
+
+    def test_reads_are_not_limited(self):
+        """GET к ограниченной вьюхе не тратит жетоны."""
+        for _ in range(3):
+            self.authorized_client.get(self.url, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.comment().status_code, 302)
+
+    @override_settings(RATE_LIMITS={
+        'posts:profile_follow': ('2/m', ('GET', 'POST')),
+        'posts:profile_unfollow': ('2/m', ('GET', 'POST')),
+    })
+    def test_follow_links_are_limited(self):
+        """Подписка и отписка по GET-ссылке тоже ограничены."""
+        client = Client()
+        client.force_login(self.other)
+        for name in ('posts:profile_follow', 'posts:profile_unfollow'):
+            url = reverse(name, args=[self.user.username])
+            with self.subTest(name=name):
+                # Повторная отписка — 404, но жетон она тоже тратит.
+                for _ in range(2):
+                    self.assertNotEqual(client.get(url).status_code, 429)
+                self.assertEqual(client.get(url).status_code, 429)
+        self.assertEqual(Follow.objects.count(), 0)
+
+    def test_refusal_keeps_tokens(self):
+        """Отказ не списывает жетоны из остальных бакетов."""
+        ratelimit.acquire(['a'], '1/m')
+        self.assertGreater(ratelimit.acquire(['a', 'b'], '1/m'), 0)
+        self.assertEqual(ratelimit.acquire(['b'], '1/m'), 0)
+
+    @override_settings(RATE_LIMITS={'users:signup': '1/h'})
+    def test_signup_is_limited(self):
+        """Регистрация ограничена по IP."""
+        data = {
+            'username': 'newbie',
+            'password1': 'Sup3r-secret-pass',
+            'password2': 'Sup3r-secret-pass',
+        }
+        self.client.post(reverse('users:signup'), data)
+        data['username'] = 'newbie2'
+        response = self.client.post(reverse('users:signup'), data)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.filter(username='newbie2').exists())
@@ -0,0 +1,96 @@
+from django.contrib.sessions.models import Session
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import routers
+from core.routers import ReplicaRouter
+from posts.models import Post, User
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], FEED_CACHE_TIMEOUT=0)
+class ReplicaRoutingTests(TransactionTestCase):
+    # В тестах реплика — зеркало default. Чтобы второе соединение видело
+    # данные, они должны быть зафиксированы, поэтому TransactionTestCase.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            text='Тестовый пост', author=self.user
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def tearDown(self):
+        routers.reset()
+
+    def replica_queries(self, client, url):
+        with CaptureQueriesContext(connections['replica']) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_router(self):
+        """Посты читаются с реплики, только когда это разрешено."""
+        router = ReplicaRouter()
+        routers.reset()
+        self.assertEqual(router.db_for_read(Post), 'default')
+        routers.use_replicas()
+        self.assertEqual(router.db_for_read(Post), 'replica')
+        self.assertEqual(router.db_for_read(User), 'default')
+        self.assertEqual(router.db_for_write(Session), 'default')
+        self.assertFalse(routers.wrote())
+        self.assertEqual(router.db_for_write(Post), 'default')
+        self.assertTrue(routers.wrote())
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+
+    def test_feeds_read_from_replica(self):
+        """Ленты и страница поста читают посты с реплики."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertGreater(self.replica_queries(self.client, url), 0)
+
+    def test_search_reads_index_and_posts_from_one_database(self):
+        """Поиск берёт и индекс, и посты с реплики."""
+        url = reverse('posts:search') + '?q=пост'
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections['replica']) as replica:
+                response = self.client.get(url)
+        self.assertContains(response, 'Тестовый пост')
+        primary_sql = ' '.join(query['sql'] for query in primary)
+        replica_sql = ' '.join(query['sql'] for query in replica)
+        self.assertNotIn('posts_post', primary_sql)
+        self.assertIn('FROM posts_post_fts', replica_sql)
+        self.assertIn('FROM "posts_post"', replica_sql)
+
+    def test_forms_read_from_primary(self):
+        """Страницы, не перечисленные в REPLICA_VIEWS, читают с default."""
+        url = reverse('posts:post_edit', args=[self.post.pk])
+        self.assertEqual(self.replica_queries(self.authorized_client, url), 0)
+
+    def test_writer_sticks_to_primary(self):
+        """После записи пользователь какое-то время читает с default."""
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'}
+        )
+        self.assertIn('primary_db', response.cookies)
+        url = reverse('posts:index')
+        self.assertEqual(self.replica_queries(self.authorized_client, url), 0)
+        self.authorized_client.cookies.pop('primary_db')
+        self.assertGreater(
+            self.replica_queries(self.authorized_client, url), 0
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        """Без реплик всё читается с default."""
+        url = reverse('posts:index')
+        self.assertEqual(self.replica_queries(self.client, url), 0)
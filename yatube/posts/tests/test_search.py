@@ -0,0 +1,86 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from posts import search
+from posts.models import Post, User
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.about_cats = Post.objects.create(
+            text='Кошки любят спать. Кошки любят рыбу.', author=cls.user
+        )
+        cls.about_dogs = Post.objects.create(
+            text='Собаки любят гулять, а кошки — нет.', author=cls.user
+        )
+        cls.about_birds = Post.objects.create(
+            text='Птицы поют по утрам.', author=cls.user
+        )
+
+    def setUp(self):
+        search.memory_index.reset()
+
+    def search(self, query, **params):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+        return list(response.context['page_obj'])
+
+    def test_backend(self):
+        """По умолчанию используется FTS5, если SQLite его поддерживает."""
+        self.assertEqual(search.backend_name(), 'fts5')
+        with override_settings(SEARCH_BACKEND='python'):
+            self.assertEqual(search.backend_name(), 'python')
+
+    def test_results_are_ranked(self):
+        """Пост, где слово встречается чаще, идёт первым."""
+        for backend in ('auto', 'python'):
+            with self.subTest(backend=backend), \
+                    override_settings(SEARCH_BACKEND=backend):
+                self.assertEqual(
+                    self.search('кошки'), [self.about_cats, self.about_dogs]
+                )
+
+    def test_all_words_and_prefixes_match(self):
+        """Ищутся посты со всеми словами запроса, слова — по префиксу."""
+        for backend in ('auto', 'python'):
+            with self.subTest(backend=backend), \
+                    override_settings(SEARCH_BACKEND=backend):
+                self.assertEqual(self.search('собак люб'), [self.about_dogs])
+                self.assertEqual(self.search('ПТИЦЫ'), [self.about_birds])
+                self.assertEqual(self.search('кошки птицы'), [])
+
+    def test_empty_query(self):
+        """Пустой запрос или одни знаки препинания ничего не находят."""
+        for query in ('', '  ', '"*:-'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [])
+
+    def test_index_follows_edit_and_delete(self):
+        """Правка и удаление поста сразу видны в поиске."""
+        for backend in ('auto', 'python'):
+            with self.subTest(backend=backend), \
+                    override_settings(SEARCH_BACKEND=backend):
+                self.search('кошки')
+                post = Post.objects.create(text='Жирафы', author=self.user)
+                self.assertEqual(self.search('жирафы'), [post])
+                post.text = 'Слоны'
+                post.save()
+                self.assertEqual(self.search('жирафы'), [])
+                self.assertEqual(self.search('слоны'), [post])
+                post.delete()
+                self.assertEqual(self.search('слоны'), [])
+
+    @override_settings(PAGE_SIZE=1)
+    def test_pagination_keeps_query(self):
+        """Результаты делятся на страницы, ссылки сохраняют запрос."""
+        response = self.client.get(reverse('posts:search'), {'q': 'кошки'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        self.assertContains(
+            response, '?' + urlencode({'q': 'кошки'}) + '&amp;page=2'
+        )
+        self.assertEqual(self.search('кошки', page=2), [self.about_dogs])
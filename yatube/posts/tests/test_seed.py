@@ -0,0 +1,75 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import AuthorStats, Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_PREGENERATE=False)
+class SeedTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, *args):
+        call_command(
+            'seed', '--users', '30', '--groups', '3', '--posts', '200',
+            '--comments', '300', '--follows', '150', '--batch-size', '64',
+            *args, stdout=StringIO()
+        )
+
+    def snapshot(self):
+        return (
+            list(Post.objects.order_by('pk').values_list(
+                'text', 'author__username', 'group__slug', 'pub_date'
+            )),
+            list(Comment.objects.order_by('pk').values_list(
+                'text', 'post__text', 'author__username'
+            )),
+            sorted(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+        )
+
+    def test_counts_and_counters(self):
+        """Создаётся заданный объём данных, счётчики сходятся."""
+        self.seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertEqual(Follow.objects.count(), 150)
+        self.assertEqual(AuthorStats.objects.count(), 30)
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+
+    def test_follows_are_skewed(self):
+        """Подписчики сосредоточены у немногих авторов."""
+        self.seed()
+        top = AuthorStats.objects.order_by('-followers_count')
+        leaders = sum(top.values_list('followers_count', flat=True)[:3])
+        self.assertGreater(leaders, 150 * 3 / 30)
+
+    def test_same_seed_same_data(self):
+        """Один и тот же --seed даёт те же данные."""
+        self.seed()
+        first = self.snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+
+    def test_placeholder_images(self):
+        """--images раздаёт части постов картинки-заглушки."""
+        self.seed('--images', '0.5')
+        with_image = Post.objects.exclude(image='')
+        self.assertTrue(50 < with_image.count() < 150)
+        self.assertLessEqual(
+            with_image.values('image').distinct().count(), 8
+        )
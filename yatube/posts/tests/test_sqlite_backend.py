@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+
+class SqliteBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.connections = ConnectionHandler({
+            alias: {
+                'ENGINE': 'core.backends.sqlite3',
+                'NAME': os.path.join(self.tmp_dir, 'db.sqlite3'),
+                'OPTIONS': {
+                    'timeout': 0,
+                    'transaction_mode': 'IMMEDIATE',
+                    'pool_size': 2,
+                    'pragmas': {
+                        'journal_mode': 'WAL', 'synchronous': 'NORMAL'
+                    },
+                },
+            }
+            for alias in ('default', 'second')
+        })
+        self.addCleanup(self.connections.close_all)
+        with self.connections['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer PRIMARY KEY)')
+
+    def test_pragmas(self):
+        """На новом соединении выполняются PRAGMA из OPTIONS."""
+        with self.connections['default'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_closed_connection_goes_back_to_pool(self):
+        """Закрытое соединение переиспользуется при следующем подключении."""
+        connection = self.connections['default']
+        raw = connection.connection
+        connection.close()
+        connection.ensure_connection()
+        self.assertIs(connection.connection, raw)
+
+    def test_transaction_takes_write_lock_immediately(self):
+        """Транзакция сразу берёт блокировку записи."""
+        first, second = self.connections['default'], self.connections['second']
+        first._start_transaction_under_autocommit()
+        with self.assertRaisesMessage(OperationalError, 'locked'):
+            second._start_transaction_under_autocommit()
+        first.connection.rollback()
+        second._start_transaction_under_autocommit()
+        with second.cursor() as cursor:
+            cursor.execute('INSERT INTO item (id) VALUES (1)')
+        second.connection.commit()
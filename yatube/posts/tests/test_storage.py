@@ -0,0 +1,62 @@
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, override_settings
+
+from core.storage import ContentAddressedStorage, MemoryStorage
+
+
+class MemoryStorageTests(SimpleTestCase):
+    def setUp(self):
+        MemoryStorage.clear()
+        self.storage = MemoryStorage()
+
+    def test_save_open_and_list(self):
+        """Файл сохраняется, читается и виден в listdir и exists."""
+        name = self.storage.save('posts/a.txt', ContentFile(b'data'))
+        with self.storage.open(name) as saved:
+            self.assertEqual(saved.read(), b'data')
+        self.assertEqual(self.storage.size(name), 4)
+        self.assertTrue(self.storage.exists('posts'))
+        self.assertEqual(self.storage.listdir(''), (['posts'], []))
+        self.assertEqual(self.storage.listdir('posts'), ([], ['a.txt']))
+        self.assertEqual(self.storage.url(name), '/media/posts/a.txt')
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists('posts'))
+
+    def test_has_no_local_path(self):
+        """path() недоступен, как у хранилищ без локальных файлов."""
+        name = self.storage.save('posts/a.txt', ContentFile(b'data'))
+        with self.assertRaises(NotImplementedError):
+            self.storage.path(name)
+
+    def test_instances_share_files_of_media_root(self):
+        """Экземпляры видят общие файлы, пока совпадает MEDIA_ROOT."""
+        self.storage.save('a.txt', ContentFile(b'data'))
+        self.assertTrue(MemoryStorage().exists('a.txt'))
+        with override_settings(MEDIA_ROOT='/elsewhere'):
+            self.assertFalse(MemoryStorage().exists('a.txt'))
+
+
+@override_settings(DEFAULT_FILE_STORAGE='core.storage.MemoryStorage')
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        MemoryStorage.clear()
+        self.storage = ContentAddressedStorage()
+
+    def test_name_is_content_hash(self):
+        """Имя файла — SHA-256 содержимого в каталоге загрузки."""
+        name = self.storage.save('posts/Cat.JPG', ContentFile(b'data'))
+        digest = (
+            '3a6eb0790f39ac87c94f3856b2dd2c5d110e6811602261a9a923d3bb23adc8b7'
+        )
+        self.assertEqual(name, f'posts/3a/6e/{digest}.jpg')
+        with self.storage.open(name) as saved:
+            self.assertEqual(saved.read(), b'data')
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковые файлы сохраняются один раз под одним именем."""
+        first = self.storage.save('posts/a.jpg', ContentFile(b'data'))
+        second = self.storage.save('posts/b.jpg', ContentFile(b'data'))
+        other = self.storage.save('posts/c.jpg', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(self.storage.listdir('posts')[0]), 2)
@@ -0,0 +1,194 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.storage import walk
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='small.png', color=(200, 0, 0)):
+    buffer = BytesIO()
+    Image.new('RGB', (100, 60), color=color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+def cached_thumbnails():
+    return [
+        name for name in walk(default_storage, '')
+        if name.startswith('cache/')
+    ]
+
+
+def variants_per_image():
+    return len(thumbnails.formats()) * len(thumbnails.geometries())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_PREGENERATE=True)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # sorl помнит готовые миниатюры в кеше, а файлы удаляются.
+        cache.clear()
+        for name in walk(default_storage, ''):
+            default_storage.delete(name)
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    # С THUMBNAIL_SYNC миниатюры готовятся в запросе и попадают в его
+    # бюджет; в пуле потоков они не считаются.
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    @mock.patch.object(
+        thumbnails.transaction, 'on_commit', lambda func: func()
+    )
+    def test_post_create_pregenerates_thumbnails(self):
+        """После создания поста миниатюры уже лежат в кеше."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': make_image()}
+        )
+        self.assertEqual(len(cached_thumbnails()), variants_per_image())
+
+    @override_settings(THUMBNAIL_SYNC=False)
+    @mock.patch.object(
+        thumbnails.transaction, 'on_commit', lambda func: func()
+    )
+    @mock.patch.object(thumbnails, 'get_executor')
+    def test_pregeneration_goes_to_pool(self, get_executor):
+        """Без THUMBNAIL_SYNC картинка уходит в пул потоков."""
+        name = default_storage.save('posts/a.png', make_image())
+        thumbnails.enqueue(name)
+        get_executor().submit.assert_called_once_with(
+            thumbnails._generate_in_worker, name
+        )
+        self.assertEqual(cached_thumbnails(), [])
+
+    @override_settings(THUMBNAIL_PREGENERATE=False)
+    @mock.patch.object(thumbnails, 'get_executor')
+    def test_pregeneration_can_be_disabled(self, get_executor):
+        """THUMBNAIL_PREGENERATE = False отключает очередь."""
+        thumbnails.enqueue(default_storage.save('posts/a.png', make_image()))
+        get_executor.assert_not_called()
+
+    def test_warm_thumbnails_command(self):
+        """warm_thumbnails готовит миниатюры для всех файлов posts/."""
+        for name in ('a.png', 'b.png', 'c.png'):
+            default_storage.save(f'posts/{name}', make_image(name))
+        call_command('warm_thumbnails', workers=1, stdout=StringIO())
+        self.assertEqual(len(cached_thumbnails()), 3 * variants_per_image())
+
+    def test_feed_renders_srcset(self):
+        """Лента отдаёт картинку с srcset всех ширин."""
+        post = Post.objects.create(
+            text='Пост с картинкой', author=self.user, image=make_image()
+        )
+        thumbnails.generate(post.image)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '<picture>')
+        for width in (320, 640, 960):
+            self.assertContains(response, f' {width}w')
+
+    @mock.patch.object(thumbnails, 'enqueue')
+    def test_feed_falls_back_until_thumbnails_are_ready(self, enqueue):
+        """Без миниатюр лента отдаёт саму картинку и ставит её в очередь."""
+        post = Post.objects.create(
+            text='Пост с картинкой', author=self.user, image=make_image()
+        )
+        for _ in range(2):
+            response = self.client.get(reverse('posts:index'))
+            self.assertNotContains(response, '<picture>')
+            self.assertContains(response, f'src="{post.image.url}"')
+        enqueue.assert_called_once()
+        self.assertEqual(cached_thumbnails(), [])
+
+    def test_feed_with_images_fits_query_budget(self):
+        """Страница с десятью картинками укладывается в бюджет запросов."""
+        for number in range(10):
+            Post.objects.create(
+                text=f'Пост {number}', author=self.user,
+                image=make_image(color=(number, 0, 0)),
+            )
+        url = reverse('posts:index')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        for post in Post.objects.all():
+            thumbnails.generate(post.image)
+        response = self.client.get(url)
+        self.assertContains(response, '<picture>', count=10)
+
+
+class FakeThumbnail:
+    def __init__(self, geometry, image_format):
+        self.url = f'/media/{geometry}.{image_format.lower()}'
+
+
+@override_settings(THUMBNAIL_WIDTHS=[320, 960], THUMBNAIL_SIZES='100vw')
+class ResponsiveImageTagTests(TestCase):
+    template = Template(
+        '{% load image_tags %}'
+        '{% responsive_image image class="card-img" %}'
+    )
+
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch.object(thumbnails, 'formats', lambda: ['WEBP', 'JPEG'])
+    @mock.patch.object(
+        thumbnails, 'get_thumbnail',
+        lambda image, geometry, **options: FakeThumbnail(
+            geometry, options['format']
+        )
+    )
+    def test_modern_formats_go_to_sources(self):
+        """WebP попадает в <source>, JPEG — в <img>."""
+        thumbnails.generate('posts/a.png')
+        self.assertHTMLEqual(
+            self.template.render(Context({'image': 'posts/a.png'})),
+            '<picture>'
+            '<source type="image/webp" sizes="100vw" '
+            'srcset="/media/320x113.webp 320w, /media/960x339.webp 960w">'
+            '<img src="/media/960x339.jpeg" sizes="100vw" '
+            'srcset="/media/320x113.jpeg 320w, /media/960x339.jpeg 960w" '
+            'width="960" height="339" loading="lazy" alt="" '
+            'class="card-img">'
+            '</picture>'
+        )
+
+    @mock.patch.object(thumbnails, 'get_thumbnail')
+    @mock.patch.object(thumbnails, 'enqueue')
+    def test_not_ready_image_renders_source(self, enqueue, get_thumbnail):
+        """Пока миниатюр нет, sorl не вызывается, выводится сама картинка."""
+        self.assertHTMLEqual(
+            self.template.render(Context({'image': 'posts/a.png'})),
+            '<img src="/media/posts/a.png" loading="lazy" alt="" '
+            'class="card-img">'
+        )
+        get_thumbnail.assert_not_called()
+        enqueue.assert_called_once()
+
+    def test_empty_image_renders_nothing(self):
+        """Пост без картинки — пустая строка."""
+        self.assertEqual(self.template.render(Context({'image': ''})), '')
+
+    @override_settings(THUMBNAIL_FORMATS=['AVIF', 'WEBP', 'BMP'])
+    def test_formats_end_with_jpeg(self):
+        """Неподдерживаемые форматы пропускаются, JPEG всегда последний."""
+        formats = thumbnails.formats()
+        self.assertEqual(formats[-1], 'JPEG')
+        self.assertNotIn('BMP', formats)
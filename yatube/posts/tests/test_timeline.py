@@ -0,0 +1,141 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import AuthorStats, Follow, Post, TimelineEntry, User
+
+
+@override_settings(TIMELINE_ENABLED=True, TIMELINE_FANOUT_LIMIT=10)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.author
+        )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow_page(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        """Подписка добавляет в ленту уже написанные посты автора."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=self.old_post
+        ).exists())
+        self.assertEqual(self.follow_page(), [self.old_post])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост сразу попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post
+        ).exists())
+        self.assertEqual(self.follow_page(), [post, self.old_post])
+
+    def test_unfollow_trims_timeline(self):
+        """Отписка убирает посты автора из ленты."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.follow_page(), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_posts_are_read_on_request(self):
+        """Посты популярных авторов подмешиваются при чтении ленты."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.follow_page(), [post, self.old_post])
+
+    def test_rebuild_timeline_command(self):
+        """Команда rebuild_timeline восстанавливает ленты по подпискам."""
+        Follow.objects.create(user=self.user, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(self.follow_page(), [self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_below_limit_is_fanned_out_again(self):
+        """Автор ниже лимита досыпает подписчикам неразложенные посты."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(
+            text='Пост знаменитости', author=self.author
+        )
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        Follow.objects.get(user=other).delete()
+        # Отписка не досыпает ленты сама: до команды посты читаются
+        # напрямую.
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(self.follow_page(), [post, self.old_post])
+        call_command('rebuild_timeline', '--pending', stdout=StringIO())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=post
+        ).exists())
+        self.assertFalse(AuthorStats.objects.filter(
+            timeline_refill=True
+        ).exists())
+        newer = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user, post=newer
+        ).exists())
+        self.assertEqual(self.follow_page(), [newer, post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, PAGE_SIZE=2)
+    def test_pages_merge_entries_and_celebrities(self):
+        """Страницы сливают ленту и посты знаменитостей без повторов."""
+        celebrity = User.objects.create_user(username='celebrity')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=celebrity)
+        posts = [self.old_post]
+        for number in range(4):
+            if number == 2:
+                # Дальше celebrity — знаменитость, а её прежние посты
+                # остаются в ленте и читаются ещё и напрямую.
+                Follow.objects.create(
+                    user=User.objects.create_user(username='fan'),
+                    author=celebrity,
+                )
+            author = celebrity if number % 2 else self.author
+            posts.append(
+                Post.objects.create(text=f'Пост {number}', author=author)
+            )
+        expected = posts[::-1]
+        for cursor in (False, True):
+            feeds = ['follow_index'] if cursor else []
+            with self.subTest(cursor=cursor), override_settings(
+                CURSOR_PAGINATION_FEEDS=feeds
+            ):
+                seen = []
+                params = {}
+                while True:
+                    response = self.authorized_client.get(
+                        reverse('posts:follow_index'), params
+                    )
+                    page_obj = response.context['page_obj']
+                    seen += list(page_obj)
+                    if not page_obj.has_next():
+                        break
+                    params = (
+                        {'after': page_obj.next_cursor} if cursor
+                        else {'page': page_obj.next_page_number()}
+                    )
+                self.assertEqual(seen, expected)
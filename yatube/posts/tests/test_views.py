@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django import forms
 
 from posts.models import Post, Group, Comment, Follow
+from posts.paginators import CursorPage, FeedPaginator
 
 
 User = get_user_model()
@@ -14,6 +18,7 @@ class YatubeViewsTests(TestCase):
     def setUpClass(cls):
         super().setUpClass()
         cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='TestUser')
         cls.group = Group.objects.create(
             title='Тестовая группа',
             slug='test-slug',
@@ -27,9 +32,8 @@ class YatubeViewsTests(TestCase):
 
     def setUp(self):
         self.guest_client = Client()
-        self.user = User.objects.create_user(username='TestUser')
         self.authorized_client = Client()
-        self.authorized_client.force_login(self.user)
+        self.authorized_client.force_login(self.reader)
 
     def test_pages_uses_correct_template(self):
         """URL-адрес использует соответствующий шаблон."""
@@ -118,9 +122,9 @@ class YatubeViewsTests(TestCase):
             data=form_data,
             follow=True,
         )
-        comment = (Comment.objects.filter(author=self.user).last())
+        comment = (Comment.objects.filter(author=self.reader).last())
         self.assertEqual(form_data['text'], comment.text)
-        self.assertEqual(str(comment.author), f'{self.user}')
+        self.assertEqual(str(comment.author), f'{self.reader}')
         self.assertEqual(post_id, comment.post.id)
 
     def test_follow(self):
@@ -213,3 +217,223 @@ class PaginatorViewsTests(TestCase):
             f'/profile/{self.user.username}/' + '?page=2'
         )
         self.assertEqual(len(response.context['page_obj']), 3)
+
+
+@override_settings(PAGINATOR_ON_EACH_SIDE=2, PAGINATOR_ON_ENDS=1)
+class FeedPaginatorTests(TestCase):
+    def test_page_window(self):
+        """Ссылки строятся окном вокруг текущей страницы."""
+        paginator = FeedPaginator(range(500), 10)
+        cases = {
+            1: [1, 2, 3, None, 50],
+            5: [1, None, 3, 4, 5, 6, 7, None, 50],
+            48: [1, None, 46, 47, 48, 49, 50],
+        }
+        for number, window in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(paginator.page(number).page_window, window)
+        self.assertEqual(
+            FeedPaginator(range(60), 10).page(3).page_window,
+            [1, 2, 3, 4, 5, 6]
+        )
+
+    def test_template_renders_window(self):
+        """Пагинатор в шаблоне не выводит все страницы подряд."""
+        cache.clear()
+        user = User.objects.create_user(username='Pag')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=user) for i in range(100)
+        )
+        response = self.client.get(reverse('posts:index'), {'page': 5})
+        self.assertContains(response, '&hellip;', count=2)
+        self.assertContains(response, '?page=10"')
+        self.assertNotContains(response, '?page=9"')
+
+    @override_settings(PAGINATOR_COUNT_TIMEOUT=60)
+    def test_approximate_count_is_cached(self):
+        """COUNT(*) ленты берётся из кеша до истечения таймаута."""
+        cache.clear()
+        user = User.objects.create_user(username='Pag')
+        Post.objects.create(text='Пост', author=user)
+        self.assertEqual(FeedPaginator(Post.objects.all(), 10).count, 1)
+        Post.objects.create(text='Ещё пост', author=user)
+        with self.assertNumQueries(0):
+            count = FeedPaginator(Post.objects.all(), 10).count
+        self.assertEqual(count, 1)
+        cache.clear()
+        self.assertEqual(FeedPaginator(Post.objects.all(), 10).count, 2)
+
+
+@override_settings(CURSOR_PAGINATION_FEEDS=['index', 'group_posts'])
+class CursorPaginatorViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Cursor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(13)
+        )
+
+    def test_index_first_page_uses_cursor(self):
+        """Лента index отдаёт страницу по курсору."""
+        response = self.client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertIsInstance(page_obj, CursorPage)
+        self.assertEqual(len(page_obj), 10)
+        self.assertTrue(page_obj.has_next())
+        self.assertFalse(page_obj.has_previous())
+
+    def test_after_and_before_walk_the_feed(self):
+        """Курсоры after/before ведут вперёд и назад без пропусков."""
+        url = reverse('posts:group_list', args=[self.group.slug])
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'after': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second), 3)
+        self.assertFalse(second.has_next())
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        self.assertEqual(list(first) + list(second), expected)
+        back = self.client.get(
+            url, {'before': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Битый курсор приводит на первую страницу."""
+        response = self.client.get(reverse('posts:index'), {'after': '%%'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_profile_keeps_page_numbers(self):
+        """Ленты вне настройки листаются по номеру страницы."""
+        response = self.client.get(
+            reverse('posts:profile', args=[self.user.username]),
+            {'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+
+@override_settings(COMMENTS_PAGE_SIZE=5)
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(
+            text='Обсуждаемый пост', author=cls.user
+        )
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {i}', author=cls.user, post=cls.post)
+            for i in range(12)
+        )
+        cls.url = reverse('posts:post_comments', args=[cls.post.pk])
+
+    def test_post_detail_shows_first_comments(self):
+        """Страница поста выводит только первую страницу комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 5)
+        self.assertContains(response, comments.next_cursor)
+
+    def test_fragments_walk_all_comments(self):
+        """Фрагменты по курсору отдают все комментарии без повторов."""
+        seen, after = [], None
+        while True:
+            response = self.client.get(
+                self.url, {'after': after} if after else {}
+            )
+            comments = response.context['comments']
+            seen += comments
+            after = comments.next_cursor
+            if not after:
+                break
+        expected = Comment.objects.filter(post=self.post).order_by(
+            '-pub_date', '-pk'
+        )
+        self.assertEqual(seen, list(expected))
+
+    def test_json_page(self):
+        """С format=json комментарии отдаются в JSON с курсором."""
+        data = self.client.get(self.url, {'format': 'json'}).json()
+        self.assertEqual(len(data['comments']), 5)
+        self.assertEqual(data['comments'][0]['author'], 'commenter')
+        data = self.client.get(
+            self.url, {'format': 'json', 'after': data['next']}
+        ).json()
+        self.assertEqual(len(data['comments']), 5)
+
+    def test_query_count_does_not_depend_on_comments(self):
+        """Число запросов фрагмента не растёт с числом комментариев."""
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+    def test_missing_post(self):
+        """Комментарии несуществующего поста отдают 404."""
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.pk + 100])
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class FeedQueryCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='feed', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(20)
+        )
+        for post in Post.objects.all():
+            Comment.objects.create(
+                text='Комментарий', author=cls.reader, post=post
+            )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def count_queries(self, url, page_size):
+        with self.settings(PAGE_SIZE=page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.authorized_client.get(url)
+        self.assertEqual(len(response.context['page_obj']), page_size)
+        return len(queries)
+
+    def test_feed_query_count_does_not_depend_on_page_size(self):
+        """Число запросов ленты не растёт вместе с размером страницы."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.count_queries(url, 2),
+                    self.count_queries(url, 20),
+                )
+
+    def test_index_query_count(self):
+        """Главная для гостя: валидаторы, подсчёт и выборка страницы."""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'][0].comments_count, 1)
@@ -0,0 +1,170 @@
+"""Миниатюры картинок постов: набор вариантов и подготовка заранее.
+
+Для каждой картинки есть миниатюры всех ширин THUMBNAIL_WIDTHS
+в каждом формате из THUMBNAIL_FORMATS, который умеют и Pillow, и sorl,
+плюс JPEG для остальных браузеров; тег {% responsive_image %} отдаёт
+их через srcset. Готовятся они в пуле фоновых потоков сразу после
+загрузки: иначе первый читатель ленты ждёт, пока Pillow уменьшит
+картинку до всех размеров.
+
+Готовый набор srcset картинки лежит в кеше, и тег берёт его оттуда
+одним обращением, не спрашивая sorl о каждом варианте. Пока набора
+нет, тег показывает саму загруженную картинку и ставит её в очередь.
+"""
+import functools
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.base import EXTENSIONS
+from sorl.thumbnail.images import ImageFile
+
+from posts import feed_cache, feed_state
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд картинка считается стоящей в очереди: столько тег
+# не ставит её туда повторно.
+PENDING_TIMEOUT = 60
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+@functools.lru_cache()
+def _can_save(image_format):
+    Image.init()
+    return image_format in Image.SAVE and image_format in EXTENSIONS
+
+
+def formats():
+    """Форматы миниатюр по убыванию предпочтения; последний — JPEG."""
+    return [
+        image_format for image_format in settings.THUMBNAIL_FORMATS
+        if image_format != 'JPEG' and _can_save(image_format)
+    ] + ['JPEG']
+
+
+def geometries():
+    """(ширина, геометрия sorl) для всех THUMBNAIL_WIDTHS."""
+    return [
+        (width, f'{width}x{round(width * settings.THUMBNAIL_RATIO)}')
+        for width in settings.THUMBNAIL_WIDTHS
+    ]
+
+
+def options(image_format):
+    return {'crop': 'center', 'upscale': True, 'format': image_format}
+
+
+def source(image):
+    """Картинка поста как файл sorl; имя ищется в хранилище картинок.
+
+    От хранилища зависит ключ миниатюры в sorl, и он должен совпасть
+    у generate() и у тега {% responsive_image post.image %}.
+    """
+    if isinstance(image, str):
+        return ImageFile(image, Post.image.field.storage)
+    return image
+
+
+def srcsets(image):
+    """[(формат, [(url, ширина), ...]), ...] в порядке formats()."""
+    return [
+        (image_format, [
+            (get_thumbnail(image, geometry, **options(image_format)).url,
+             width)
+            for width, geometry in geometries()
+        ])
+        for image_format in formats()
+    ]
+
+
+def _key(prefix, image):
+    image = source(image)
+    variants = (
+        image.name, formats(), settings.THUMBNAIL_WIDTHS,
+        settings.THUMBNAIL_RATIO,
+    )
+    return f'thumbnails:{prefix}:' + hashlib.md5(
+        repr(variants).encode()
+    ).hexdigest()
+
+
+def ready(image):
+    """srcsets() картинки, если миниатюры уже готовы, иначе None."""
+    return cache.get(_key('ready', image))
+
+
+def forget(image):
+    """Забывает готовый набор, например вместе с удалённым файлом."""
+    cache.delete_many((_key('ready', image), _key('pending', image)))
+
+
+def _refresh_pages(name):
+    # Ленты и страницы постов, отданные без миниатюр, не должны
+    # оставаться в кеше лент и отвечать 304 по старым валидаторам.
+    posts = Post.objects.filter(image=name)
+    feeds = list(posts.values_list('group__slug', 'author__username'))
+    feed_cache.invalidate_feeds(*feeds)
+    feed_state.touch_feeds(*feeds)
+    posts.update(updated=timezone.now())
+
+
+def generate(image):
+    """Создаёт миниатюры всех ширин во всех форматах и запоминает их."""
+    image = source(image)
+    key = _key('ready', image)
+    fresh = cache.get(key) is None
+    cache.set(key, srcsets(image), None)
+    if fresh:
+        _refresh_pages(image.name)
+
+
+def _generate_in_worker(image):
+    try:
+        generate(image)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры для %s', image)
+    finally:
+        connections.close_all()
+
+
+def enqueue(image):
+    """Ставит картинку в очередь после фиксации транзакции.
+
+    При THUMBNAIL_SYNC = True миниатюры готовятся в том же потоке.
+    """
+    if not image or not settings.THUMBNAIL_PREGENERATE:
+        return
+    if settings.THUMBNAIL_SYNC:
+        transaction.on_commit(lambda: generate(image))
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(_generate_in_worker, image)
+    )
+
+
+def schedule(image):
+    """enqueue() для читателя: картинка встаёт в очередь один раз."""
+    if cache.add(_key('pending', image), True, PENDING_TIMEOUT):
+        enqueue(image)
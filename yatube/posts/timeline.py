@@ -0,0 +1,249 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+Новый пост сразу раскладывается по лентам подписчиков автора, и
+follow_index читает готовую ленту по индексу (user, -pub_date) вместо
+join через Follow: страница выбирается из TimelineEntry, и только её
+посты грузятся одним запросом. Авторы, у которых подписчиков больше
+TIMELINE_FANOUT_LIMIT, не раскладываются: их посты подмешиваются
+при чтении (fan-out-on-read). Когда автор опускается до лимита,
+его посты нужно разложить всем подписчикам заново: написанные за время
+популярности не попали ни в одну ленту. Это до LIMIT ×
+TIMELINE_BACKFILL_SIZE строк, поэтому отписка лишь ставит автору флаг
+timeline_refill, а ленты досыпает `manage.py rebuild_timeline
+--pending`; пока флаг стоит, посты автора читаются напрямую.
+"""
+import re
+
+from django.conf import settings
+from django.db.models import Q
+
+from posts.models import AuthorStats, Follow, Post, TimelineEntry
+
+BATCH_SIZE = 1000
+
+
+def is_enabled():
+    return settings.TIMELINE_ENABLED
+
+
+def _read_directly(prefix=''):
+    return (
+        Q(**{f'{prefix}followers_count__gt': settings.TIMELINE_FANOUT_LIMIT})
+        | Q(**{f'{prefix}timeline_refill': True})
+    )
+
+
+def is_celebrity(author_id):
+    """Посты автора не раскладываются при записи, а читаются напрямую.
+
+    Так у знаменитостей и у авторов, чьи ленты ждут досыпки.
+    """
+    return AuthorStats.objects.filter(
+        _read_directly(), user_id=author_id
+    ).exists()
+
+
+def followed_celebrities(user):
+    """id авторов из подписок user, чьи посты читаются напрямую."""
+    return list(Follow.objects.filter(
+        _read_directly('author__stats__'), user=user
+    ).values_list('author_id', flat=True))
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    """Кладёт новый пост в ленты всех подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator(chunk_size=BATCH_SIZE):
+        batch.append(TimelineEntry(
+            user_id=user_id, post_id=post.pk, pub_date=post.pub_date
+        ))
+        if len(batch) >= BATCH_SIZE:
+            _bulk_insert(batch)
+            batch = []
+    if batch:
+        _bulk_insert(batch)
+
+
+def _recent_posts(author_id):
+    return list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL_SIZE])
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту свежие посты автора после подписки."""
+    if is_celebrity(author_id):
+        return
+    _bulk_insert([
+        TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in _recent_posts(author_id)
+    ])
+
+
+def backfill_followers(author_id):
+    """Раскладывает свежие посты автора по лентам всех подписчиков."""
+    posts = _recent_posts(author_id)
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator(chunk_size=BATCH_SIZE):
+        batch += [
+            TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ]
+        if len(batch) >= BATCH_SIZE:
+            _bulk_insert(batch)
+            batch = []
+    if batch:
+        _bulk_insert(batch)
+
+
+def follow(user_id, author_id):
+    """Подписка: свежие посты автора попадают в ленту читателя."""
+    backfill(user_id, author_id)
+
+
+def unfollow(user_id, author_id):
+    """Отписка: посты автора уходят из ленты читателя.
+
+    Если автор при этом перестал быть знаменитостью, ленты его
+    подписчиков ставятся в очередь на досыпку (refill_pending()).
+    """
+    trim(user_id, author_id)
+    AuthorStats.objects.filter(
+        user_id=author_id, followers_count=settings.TIMELINE_FANOUT_LIMIT
+    ).update(timeline_refill=True)
+
+
+def refill_pending():
+    """Досыпает ленты подписчиков авторов с флагом timeline_refill.
+
+    Флаг снимается до выборки постов: новые посты с этого момента
+    раскладываются при записи, а прежние досыпаются здесь. Автор,
+    снова ставший знаменитостью, просто остаётся читаться напрямую.
+    Возвращает число обработанных авторов.
+    """
+    pending = AuthorStats.objects.filter(timeline_refill=True)
+    authors = list(pending.values_list('user_id', 'followers_count'))
+    for author_id, followers in authors:
+        pending.filter(user_id=author_id).update(timeline_refill=False)
+        if followers <= settings.TIMELINE_FANOUT_LIMIT:
+            backfill_followers(author_id)
+    return len(authors)
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild():
+    """Пересобирает все ленты с нуля по текущим подпискам."""
+    TimelineEntry.objects.all().delete()
+    AuthorStats.objects.filter(timeline_refill=True).update(
+        timeline_refill=False
+    )
+    edges = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in edges.iterator(chunk_size=BATCH_SIZE):
+        backfill(user_id, author_id)
+
+
+def _for_entries(condition):
+    """Условие на посты (pub_date, pk) как условие на TimelineEntry."""
+    translated = Q()
+    translated.connector = condition.connector
+    translated.negated = condition.negated
+    translated.children = [
+        _for_entries(child) if isinstance(child, Q)
+        else (re.sub(r'^pk(?=__|$)', 'post_id', child[0]), child[1])
+        for child in condition.children
+    ]
+    return translated
+
+
+class Timeline:
+    """Лента подписок для пагинаторов: страница берётся по индексу.
+
+    Строки (pub_date, post_id) выбираются из TimelineEntry читателя
+    вместе с постами знаменитостей через UNION, сортируются и режутся
+    на страницу, а посты страницы грузятся одним запросом. Умеет то,
+    что нужно FeedPaginator (count() и срезы) и CursorPaginator
+    (filter() и order_by() по pub_date и pk).
+    """
+
+    def __init__(self, entries, celebrity_posts=None,
+                 ordering=('-pub_date', '-pk')):
+        self.entries = entries.order_by()
+        self.celebrity_posts = (
+            None if celebrity_posts is None else celebrity_posts.order_by()
+        )
+        self.ordering = ordering
+
+    def _clone(self, **changes):
+        state = {
+            'entries': self.entries,
+            'celebrity_posts': self.celebrity_posts,
+            'ordering': self.ordering,
+        }
+        state.update(changes)
+        return Timeline(**state)
+
+    def filter(self, condition):
+        return self._clone(
+            entries=self.entries.filter(_for_entries(condition)),
+            celebrity_posts=(
+                None if self.celebrity_posts is None
+                else self.celebrity_posts.filter(condition)
+            ),
+        )
+
+    def order_by(self, *ordering):
+        return self._clone(ordering=ordering)
+
+    def _rows(self):
+        rows = self.entries.values_list('pub_date', 'post_id')
+        if self.celebrity_posts is not None:
+            rows = rows.union(
+                self.celebrity_posts.values_list('pub_date', 'pk')
+            )
+        return rows
+
+    def count(self):
+        return self._rows().count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        ordering = [
+            re.sub(r'^(-?)pk$', r'\1post_id', field)
+            for field in self.ordering
+        ]
+        rows = list(self._rows().order_by(*ordering)[index])
+        posts = Post.objects.feed().in_bulk([pk for _, pk in rows])
+        return [posts[pk] for _, pk in rows if pk in posts]
+
+
+def timeline_posts(user):
+    """Посты для follow_index: готовая лента плюс посты знаменитостей."""
+    entries = TimelineEntry.objects.filter(user=user)
+    celebrities = followed_celebrities(user)
+    if not celebrities:
+        return Timeline(entries)
+    return Timeline(entries, Post.objects.filter(author_id__in=celebrities))
@@ -1,28 +1,47 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils.http import urlencode
 from django.shortcuts import render, redirect, get_object_or_404
 from django.conf import settings
-from posts.models import Post, Group, Follow, User
+from posts.models import Comment, Post, Group, Follow, User
 from posts.forms import PostForm, CommentForm
+from posts.paginators import CursorPaginator, FeedPaginator
+from posts import moderation, thumbnails, timeline
+from posts.conditional import (
+    group_condition, index_condition, post_condition, profile_condition
+)
+from posts.search import SearchResults
+
+
+def paginate(request, queryset, feed):
+    """Разбивает ленту на страницы: по номеру или по курсору."""
+    if feed in settings.CURSOR_PAGINATION_FEEDS:
+        paginator = CursorPaginator(queryset, settings.PAGE_SIZE)
+        return paginator.get_page(
+            after=request.GET.get(paginator.after_param),
+            before=request.GET.get(paginator.before_param),
+        )
+    paginator = FeedPaginator(queryset, settings.PAGE_SIZE)
+    page_number = request.GET.get('page')
+    return paginator.get_page(page_number)
 
 
+@index_condition
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.feed()
+    page_obj = paginate(request, post_list, 'index')
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@group_condition
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, settings.PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.feed()
+    page_obj = paginate(request, posts, 'group_posts')
     context = {
         'group': group,
         'posts': posts,
@@ -31,12 +50,13 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context=context)
 
 
+@profile_condition
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_post_list = author.posts.all()
-    paginator = Paginator(author_post_list, settings.PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    author_post_list = author.posts.feed()
+    page_obj = paginate(request, author_post_list, 'profile')
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user,
@@ -52,18 +72,55 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def comments_page(request, post_id):
+    """Страница комментариев поста по курсору ?after=."""
+    comments = Comment.objects.visible().filter(
+        post_id=post_id
+    ).select_related('author').only(
+        'text', 'pub_date', 'post_id', 'author__username'
+    )
+    paginator = CursorPaginator(comments, settings.COMMENTS_PAGE_SIZE)
+    return paginator.get_page(after=request.GET.get(paginator.after_param))
+
+
+@post_condition
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), id=post_id
+    )
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
-        'comments': comments,
+        'comments': comments_page(request, post_id),
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@post_condition
+def post_comments(request, post_id):
+    """Следующие комментарии поста: HTML-фрагмент или JSON."""
+    get_object_or_404(Post.objects.only('pk'), id=post_id)
+    comments = comments_page(request, post_id)
+    if request.GET.get('format') != 'json':
+        return render(request, 'posts/includes/comments.html', {
+            'post_id': post_id,
+            'comments': comments,
+        })
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'pub_date': comment.pub_date,
+            }
+            for comment in comments
+        ],
+        'next': comments.next_cursor,
+    })
+
+
 @login_required
 def post_create(request):
     if request.method != 'POST':
@@ -74,7 +131,9 @@ def post_create(request):
         return render(request, 'posts/create_post.html', {'form': form})
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    with transaction.atomic():
+        post.save()
+        thumbnails.enqueue(post.image)
     return redirect('posts:profile', request.user.username)
 
 
@@ -92,6 +151,8 @@ def post_edit(request, post_id):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if 'image' in form.changed_data:
+        thumbnails.enqueue(post.image)
     return redirect('posts:post_detail', post_id=post.id)
 
 
@@ -103,18 +164,23 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        comment.moderation = (
+            moderation.is_enabled() and not request.user.is_staff
+        )
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    )
-    paginator = Paginator(posts, settings.PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    if timeline.is_enabled():
+        posts = timeline.timeline_posts(request.user)
+    else:
+        posts = Post.objects.feed().filter(
+            author__following__user=request.user
+        )
+    page_obj = paginate(request, posts, 'follow_index')
     context = {
         'posts': posts,
         'page_obj': page_obj
@@ -122,12 +188,25 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = FeedPaginator(SearchResults(query), settings.PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user.username == username:
         return redirect('posts:profile', username=username)
-    Follow.objects.get_or_create(user=request.user, author=author)
+    with transaction.atomic():
+        Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
@@ -135,5 +214,6 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     follower = get_object_or_404(Follow, author=author, user=request.user)
-    follower.delete()
+    with transaction.atomic():
+        follower.delete()
     return redirect('posts:profile', username=username)
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +58,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -64,7 +67,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.templates.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,6 +83,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# yatube.asgi выполняет запросы в пуле из стольких потоков.
+ASGI_THREADS = 16
 
 
 # Database
@@ -89,9 +94,33 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Локальная реплика: копия default, которую обновляет
+    # `manage.py sync_replicas`. В тестах это та же база, что default.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Алиасы реплик для чтения лент, например ['replica']. Пустой список —
+# всё читается с default.
+DATABASE_REPLICAS = []
+# Вьюхи, которые при GET читают посты с реплик.
+REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+    'posts:search',
+]
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_STICKY_SECONDS = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,8 +170,124 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 PAGE_SIZE = 10
+# Комментарии на странице поста; дальше они подгружаются по курсору
+# с posts/<id>/comments/.
+COMMENTS_PAGE_SIZE = 20
+# Новые комментарии не-staff пользователей ждут одобрения в админке
+# (действия «Одобрить» и «Отклонить» у комментариев).
+COMMENT_MODERATION = False
+# Ссылки пагинатора: столько страниц вокруг текущей и по краям списка.
+PAGINATOR_ON_EACH_SIDE = 3
+PAGINATOR_ON_ENDS = 1
+# Сколько секунд кешировать COUNT(*) лент; 0 — считать на каждый запрос.
+PAGINATOR_COUNT_TIMEOUT = 0
+
+# Кеш без внешних сервисов. Для нескольких процессов подойдут
+# django.core.cache.backends.filebased.FileBasedCache или
+# django.core.cache.backends.db.DatabaseCache (`manage.py createcachetable`).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Страницы лент index, group_posts и profile для анонимных читателей.
+# Кеш сбрасывается сигналами Post, Group и Comment только для
+# затронутых лент. FEED_CACHE_TIMEOUT = 0 отключает кеширование.
+FEED_CACHE_ALIAS = 'default'
+FEED_CACHE_TIMEOUT = 60 * 15
+
+# Ленты, которые листаются по курсору (?after=/?before=) вместо ?page=:
+# 'index', 'group_posts', 'profile', 'follow_index'.
+CURSOR_PAGINATION_FEEDS = []
+
+# Материализованная лента подписок: посты раскладываются подписчикам
+# при публикации. Авторы с числом подписчиков больше лимита читаются
+# напрямую. После включения выполните `manage.py rebuild_timeline`,
+# а `manage.py rebuild_timeline --pending` запускайте по cron: он
+# досыпает ленты, когда автор после отписок опускается до лимита.
+TIMELINE_ENABLED = False
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL_SIZE = 200
+
+# Поиск по постам: 'fts5' — индекс SQLite из миграции 0010_post_fts,
+# 'python' — индекс в памяти процесса, 'auto' — FTS5, если он есть.
+SEARCH_BACKEND = 'auto'
+
+# Метрики вьюх: число SQL-запросов, время SQL, шаблонов и ответа.
+# Гистограммы по процессу отдаются staff-пользователям на /metrics/,
+# значения текущего запроса — в заголовке Server-Timing.
+METRICS_ENABLED = True
+METRICS_SERVER_TIMING = True
+# Предельное число SQL-запросов вьюхи. Превышение пишется в лог,
+# а при QUERY_BUDGET_STRICT = True вызывает QueryBudgetExceeded.
+# Значения измерены тестами (профиль settings_test строгий) и включают
+# сессию и пользователя; для записи — худший случай: пост с группой
+# и новой картинкой, первая подписка с перестройкой ленты.
+QUERY_BUDGETS = {
+    'posts:index': 5,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 5,
+    'posts:post_comments': 3,
+    'posts:follow_index': 6,
+    'posts:search': 6,
+    'posts:post_create': 13,
+    'posts:post_edit': 13,
+    'posts:add_comment': 9,
+    'posts:profile_follow': 16,
+    'posts:profile_unfollow': 13,
+}
+QUERY_BUDGET_STRICT = False
+
+# Лимиты на запись: вьюха -> 'число/период' (s, m, h, d) для всех
+# методов, кроме GET, HEAD и OPTIONS, или ('число/период', методы).
+# Бакеты ведутся отдельно по IP и по пользователю; ответ сверх
+# лимита — 429. Подписка и отписка — GET-ссылки, которые пишут.
+RATE_LIMITS = {
+    'posts:post_create': '10/m',
+    'posts:post_edit': '30/m',
+    'posts:add_comment': '20/m',
+    'posts:profile_follow': ('30/m', ('GET', 'POST')),
+    'posts:profile_unfollow': ('30/m', ('GET', 'POST')),
+    'users:signup': '5/h',
+}
+# Кеш для бакетов: locmem считает лимиты в каждом процессе отдельно,
+# общие для всех воркеров лимиты даёт файловый кеш или кеш в БД.
+RATE_LIMIT_CACHE_ALIAS = 'default'
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Сколько секунд картинка без ссылок из постов лежит до удаления
+# `manage.py gc_media`: за это время её успевает подхватить загрузка
+# того же файла, которая уже получила имя, но ещё не сохранила пост.
+MEDIA_GC_GRACE = 24 * 60 * 60
+
+# Загрузки крупнее этого размера пишутся во временный файл частями.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# Ограничения для картинок постов; в базу попадает пережатая копия.
+POST_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 25_000_000
+POST_IMAGE_MAX_SIDE = 1920
+# WEBP, если Pillow собран с libwebp, иначе JPEG.
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 85
+
+# Миниатюры для картинок постов готовятся в фоне сразу после загрузки:
+# все ширины THUMBNAIL_WIDTHS с обрезкой до высоты ширина × RATIO в каждом
+# формате THUMBNAIL_FORMATS, который умеют Pillow и sorl, и в JPEG.
+# Пока их нет, страницы показывают загруженную картинку. При False
+# миниатюры готовит только команда warm_thumbnails.
+THUMBNAIL_PREGENERATE = True
+THUMBNAIL_WORKERS = 2
+# True — готовить миниатюры в потоке запроса, без пула: для тестов
+# с SQLite в памяти, которую потоки пула не видят.
+THUMBNAIL_SYNC = False
+THUMBNAIL_WIDTHS = [320, 640, 960]
+THUMBNAIL_RATIO = 339 / 960
+THUMBNAIL_FORMATS = ['AVIF', 'WEBP']
+# Атрибут sizes по умолчанию: какой ширины картинка на экране.
+THUMBNAIL_SIZES = '(min-width: 992px) 960px, 100vw'
@@ -0,0 +1,36 @@
+"""Профиль для боевого сервера поверх yatube.settings.
+
+SQLite работает в режиме WAL: читатели не ждут писателей, а писатели
+выстраиваются в очередь по busy timeout. Соединения живут между
+запросами (CONN_MAX_AGE) и возвращаются в пул, когда поток завершается.
+
+    DJANGO_SETTINGS_MODULE=yatube.settings_production gunicorn yatube.wsgi
+"""
+import os
+
+from yatube.settings import *  # noqa: F401,F403
+from yatube.settings import BASE_DIR
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'pool_size': 16,
+            'pragmas': {
+                'journal_mode': 'WAL',
+                # В режиме WAL NORMAL не теряет целостность при сбое,
+                # но не делает fsync на каждый коммит.
+                'synchronous': 'NORMAL',
+                'cache_size': -64000,
+                'temp_store': 'MEMORY',
+                'mmap_size': 256 * 1024 * 1024,
+            },
+        },
+    }
+}
@@ -0,0 +1,33 @@
+"""Профиль для тестов поверх yatube.settings.
+
+Пароли хешируются MD5 вместо PBKDF2, база — SQLite в памяти, медиафайлы
+лежат в памяти процесса (core.storage.MemoryStorage), миниатюры заранее
+не готовятся, бюджеты запросов строгие. Тесты, которым нужна подготовка
+миниатюр, включают THUMBNAIL_PREGENERATE через override_settings;
+готовятся они тогда в потоке запроса (THUMBNAIL_SYNC).
+
+`manage.py test` и pytest (pytest.ini) берут этот профиль сами.
+Каждый процесс при параллельном запуске получает свою копию базы:
+Django копирует базу в памяти при fork, pytest-xdist создаёт её заново.
+
+    python manage.py test --parallel 4
+    pytest -n 4
+"""
+from yatube.settings import *  # noqa: F401,F403
+from yatube.settings import DATABASES
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Ни тесты, ни команды под этим профилем не трогают db.sqlite3.
+DATABASES = {
+    alias: {**database, 'NAME': ':memory:'}
+    for alias, database in DATABASES.items()
+}
+
+DEFAULT_FILE_STORAGE = 'core.storage.MemoryStorage'
+
+THUMBNAIL_PREGENERATE = False
+THUMBNAIL_SYNC = True
+
+# Вьюха сверх бюджета из QUERY_BUDGETS роняет тест.
+QUERY_BUDGET_STRICT = True